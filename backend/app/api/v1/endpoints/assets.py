@@ -1,11 +1,14 @@
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.json_output import encode_json
+from app.services.chart_series import PACKED_MEDIA_TYPE, json_floats
+from app.services.indicators import parse_indicators
 from app.services.market_service import MarketService
 from app.services.mock_data_service import MockDataService
-from app.schemas.market import AssetDetailResponse, HistoricalDataResponse
+from app.schemas.market import AssetDetailResponse, AssetStatisticsResponse, HistoricalDataResponse
 from app.core.config import settings
 
 router = APIRouter()
@@ -41,31 +44,85 @@ async def get_asset_detail(
         raise HTTPException(status_code=500, detail=f"Failed to fetch asset detail: {str(e)}")
 
 
-@router.get("/{symbol}/chart", response_model=HistoricalDataResponse)
+@router.get(
+    "/{symbol}/chart",
+    response_model=HistoricalDataResponse,
+    responses={
+        200: {
+            "content": {PACKED_MEDIA_TYPE: {}},
+            "description": "format=points (default) as below, format=columnar as parallel JSON arrays "
+                           "with epoch-millisecond timestamps, format=binary as packed little-endian columns",
+        }
+    },
+)
 async def get_chart_data(
     symbol: str,
     range: str = Query("1D", regex="^(1D|1M|6M|1Y|5Y)$"),
     interval: Optional[str] = Query(None, regex="^(1m|5m|15m|1h|1d)$"),
+    max_points: Optional[int] = Query(None, ge=2, le=10000, description="Downsample to at most this many points"),
+    downsample: str = Query("lttb", regex="^(lttb|ohlc)$", description="lttb (line shape) or ohlc (candle envelope)"),
+    format: str = Query(
+        "points",
+        regex="^(points|columnar|binary)$",
+        description="points (list of objects), columnar (parallel JSON arrays) or binary (packed little-endian columns)"
+    ),
+    indicators: Optional[str] = Query(
+        None,
+        description="Comma-separated overlays, e.g. sma20,rsi14: sma5/10/20/50/100/200, ema9/12/20/26/50/100/200, "
+                    "rsi7/14/21, bb10/20/50 (Bollinger, 2 std)"
+    ),
     db: Session = Depends(get_db)
 ):
     """Get historical chart data for a specific symbol and time range"""
     try:
         symbol = symbol.upper()
+        try:
+            indicator_names = parse_indicators(indicators)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
         
         if settings.USE_MOCK_DATA:
             service = MockDataService()
-            chart_data = await service.get_chart_data(symbol, range, interval)
         else:
             service = MarketService(db)
-            chart_data = await service.get_chart_data(symbol, range, interval)
-        
-        if not chart_data.data:
+
+        if format == "points":
+            chart_data = await service.get_chart_data(symbol, range, interval, max_points, downsample, indicator_names)
+            if not chart_data.data:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No chart data available for symbol: {symbol}"
+                )
+            return chart_data
+
+        series, overlays = await service.get_chart_series(
+            symbol, range, interval, max_points, downsample, indicator_names
+        )
+        if not len(series):
             raise HTTPException(
                 status_code=404,
                 detail=f"No chart data available for symbol: {symbol}"
             )
-        
-        return chart_data
+
+        # Encoded straight from the arrays; building one model per point is what these formats avoid
+        resolved_interval = interval or MarketService.default_interval(range)
+        if format == "binary":
+            headers = {"X-Symbol": symbol, "X-Time-Range": range, "X-Interval": resolved_interval}
+            if overlays:
+                # Names of the extra float64 columns after volume, in order
+                headers["X-Indicator-Columns"] = ",".join(overlays)
+            return Response(content=series.to_packed(overlays), media_type=PACKED_MEDIA_TYPE, headers=headers)
+        return Response(
+            content=encode_json({
+                "symbol": symbol,
+                "time_range": range,
+                "interval": resolved_interval,
+                "total_points": len(series),
+                **series.to_columns(),
+                "indicators": {name: json_floats(values) for name, values in overlays.items()} or None,
+            }),
+            media_type="application/json"
+        )
         
     except HTTPException:
         raise
@@ -73,7 +130,7 @@ async def get_chart_data(
         raise HTTPException(status_code=500, detail=f"Failed to fetch chart data: {str(e)}")
 
 
-@router.get("/{symbol}/stats")
+@router.get("/{symbol}/stats", response_model=AssetStatisticsResponse)
 async def get_asset_statistics(
     symbol: str,
     db: Session = Depends(get_db)
@@ -1,100 +1,201 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
-from sqlalchemy.orm import Session
+import asyncio
+from typing import Any, Awaitable, Callable, List, Optional
+from fastapi import APIRouter, HTTPException, Header, Query, Response
+from pydantic import TypeAdapter
 
-from app.core.database import get_db
+from app.core.database import SessionLocal
+from app.core.response_cache import cache_key, response_cache
 from app.services.market_service import MarketService
 from app.services.mock_data_service import MockDataService
 from app.schemas.market import MarketOverviewResponse, MarketDataResponse
 from app.core.config import settings
+from app.services.generated_data import document_path, etag_matches, generated_data_store
+from app.services.refresh_jobs import load_script
+from app.worker import enqueue, generate_market_task, get_task_status, refresh_quotes_task
 
 router = APIRouter()
 
 
+_overview_adapter = TypeAdapter(MarketOverviewResponse)
+_markets_adapter = TypeAdapter(List[MarketDataResponse])
+_market_adapter = TypeAdapter(MarketDataResponse)
+_stale_checks = set()
+
+
+def _encode(adapter: TypeAdapter, data: Any) -> bytes:
+    return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+async def _cached_response(key: str, compute: Callable[[], Awaitable[bytes]]) -> Response:
+    """
+    Serve ``compute()``'s payload through the shared response cache. It may
+    run after this request has returned (stale-while-revalidate), so it must
+    open its own database session rather than use the request's.
+    """
+    if settings.RESPONSE_CACHE_ENABLED:
+        payload = await response_cache.get_or_compute(key, compute)
+    else:
+        payload = await compute()
+    return Response(content=payload, media_type="application/json")
+
+
+async def _check_stale_data():
+    with SessionLocal() as db:
+        await MarketService(db).check_and_update_stale_data()
+
+
 @router.get("/overview", response_model=MarketOverviewResponse)
-async def get_market_overview(
-    db: Session = Depends(get_db),
-    background_tasks: BackgroundTasks = BackgroundTasks()
-):
+async def get_market_overview():
     """Get overview of all tracked markets with current data"""
-    try:
+    async def compute() -> bytes:
         if settings.USE_MOCK_DATA:
             service = MockDataService()
-            overview_data = await service.get_market_overview()
-            return overview_data
-        else:
+            return _encode(_overview_adapter, await service.get_market_overview())
+        with SessionLocal() as db:
             service = MarketService(db)
-            overview_data = await service.get_market_overview()
-            
-            # Schedule background update if needed
-            background_tasks.add_task(service.check_and_update_stale_data)
-            
-            return overview_data
-            
+            payload = _encode(_overview_adapter, await service.get_market_overview())
+
+        # Schedule background update if needed (once per recompute, not per hit)
+        task = asyncio.create_task(_check_stale_data())
+        _stale_checks.add(task)
+        task.add_done_callback(_stale_checks.discard)
+        return payload
+
+    try:
+        return await _cached_response(cache_key("markets:overview", mock=settings.USE_MOCK_DATA), compute)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch market overview: {str(e)}")
 
 
 @router.get("/all", response_model=List[MarketDataResponse])
-async def get_all_markets(
-    active_only: bool = True,
-    db: Session = Depends(get_db)
-):
+async def get_all_markets(active_only: bool = True):
     """Get all market data entries"""
-    try:
+    async def compute() -> bytes:
         if settings.USE_MOCK_DATA:
             service = MockDataService()
-            markets = await service.get_all_markets(active_only=active_only)
-            return markets
-        else:
+            return _encode(_markets_adapter, await service.get_all_markets(active_only=active_only))
+        with SessionLocal() as db:
             service = MarketService(db)
-            markets = await service.get_all_markets(active_only=active_only)
-            return markets
-            
+            return _encode(_markets_adapter, await service.get_all_markets(active_only=active_only))
+
+    try:
+        return await _cached_response(
+            cache_key("markets:all", active_only=active_only, mock=settings.USE_MOCK_DATA), compute
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch markets: {str(e)}")
 
 
-@router.get("/{symbol}", response_model=MarketDataResponse)
-async def get_market_data(
-    symbol: str,
-    db: Session = Depends(get_db)
+def _generated_response(relative_path: str, if_none_match: Optional[str]) -> Response:
+    """Serve a generated document with a strong ETag, or 304 if the client copy is current"""
+    document = generated_data_store.get(relative_path)
+    if document is None:
+        raise HTTPException(status_code=404, detail=f"Generated data not found: {relative_path}")
+
+    headers = {
+        "ETag": document.etag,
+        "Cache-Control": settings.GENERATED_DATA_CACHE_CONTROL
+    }
+    if etag_matches(if_none_match, document.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=document.content, media_type="application/json", headers=headers)
+
+
+@router.get("/generated/manifest")
+async def get_generated_manifest(if_none_match: Optional[str] = Header(None)):
+    """Manifest of generated market documents with per-section hashes and sizes"""
+    return _generated_response(document_path(), if_none_match)
+
+
+@router.get("/generated/{market_key}")
+async def get_generated_market(market_key: str, if_none_match: Optional[str] = Header(None)):
+    """Complete generated document for one market (news, forecasts, popup and report)"""
+    try:
+        relative_path = document_path(market_key)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _generated_response(relative_path, if_none_match)
+
+
+@router.get("/generated/{market_key}/{section}")
+async def get_generated_market_section(
+    market_key: str,
+    section: str,
+    if_none_match: Optional[str] = Header(None)
 ):
-    """Get detailed data for a specific market symbol"""
+    """One section (news, forecasts, popup or report) of a generated market document"""
     try:
-        if settings.USE_MOCK_DATA:
-            service = MockDataService()
-            market_data = await service.get_market_data(symbol.upper())
-        else:
-            service = MarketService(db)
-            market_data = await service.get_market_data(symbol.upper())
-        
+        relative_path = document_path(market_key, section)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return _generated_response(relative_path, if_none_match)
+
+
+@router.get("/{symbol}", response_model=MarketDataResponse)
+async def get_market_data(symbol: str):
+    """Get detailed data for a specific market symbol"""
+    symbol = symbol.upper()
+
+    def encode(market_data) -> bytes:
+        # Not-found is raised rather than returned, so it is never cached
         if not market_data:
             raise HTTPException(
                 status_code=404, 
                 detail=f"Market data not found for symbol: {symbol}"
             )
-        
-        return market_data
-        
+        return _encode(_market_adapter, market_data)
+
+    async def compute() -> bytes:
+        if settings.USE_MOCK_DATA:
+            service = MockDataService()
+            return encode(await service.get_market_data(symbol))
+        with SessionLocal() as db:
+            service = MarketService(db)
+            return encode(await service.get_market_data(symbol))
+
+    try:
+        return await _cached_response(cache_key("markets:symbol", symbol=symbol, mock=settings.USE_MOCK_DATA), compute)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch market data: {str(e)}")
 
 
+@router.get("/tasks/{task_id}")
+async def get_refresh_task_status(task_id: str):
+    """Status of a queued refresh task (PENDING, STARTED, SUCCESS, FAILURE, ...)"""
+    try:
+        return get_task_status(task_id)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"Task backend unavailable: {str(e)}")
+
+
 @router.post("/refresh")
-async def refresh_market_data(
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+def refresh_market_data(
+    include_insights: bool = Query(False, description="Also queue the LLM generator pipeline per market"),
+    markets: Optional[List[str]] = Query(None, description="Markets for the generator pipeline (default: all)")
 ):
-    """Trigger refresh of all market data"""
+    """Queue a refresh of all market data on the background workers"""
+    # Plain def: FastAPI runs it in the threadpool, since enqueue blocks on the
+    # broker (and runs the task inline with CELERY_TASK_ALWAYS_EAGER)
+    market_keys = list(load_script("market_data_fetcher").MARKETS)
+    if markets:
+        unknown = sorted(set(markets) - set(market_keys))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown markets: {', '.join(unknown)}")
+        market_keys = markets
+
     try:
-        if not settings.USE_MOCK_DATA:
-            service = MarketService(db)
-            background_tasks.add_task(service.refresh_all_market_data)
-        
-        return {"message": "Market data refresh initiated"}
-        
+        tasks = []
+        task_id, created = enqueue(refresh_quotes_task)
+        tasks.append({"task": "refresh_quotes", "taskId": task_id, "created": created})
+
+        if include_insights:
+            for market_key in market_keys:
+                task_id, created = enqueue(generate_market_task, market_key)
+                tasks.append({"task": "generate_market", "market": market_key, "taskId": task_id, "created": created})
+
+        return {"message": "Market data refresh queued", "tasks": tasks}
+
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to refresh market data: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=503, detail=f"Failed to queue market data refresh: {str(e)}")
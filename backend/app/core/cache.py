@@ -0,0 +1,166 @@
+"""Persistent key/value cache with per-entry TTL and size-bounded LRU eviction"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set
+
+from app.core.json_output import file_lock
+
+
+_MISSING = object()
+
+
+class PersistentTTLCache:
+    """
+    JSON-file backed cache.
+
+    Entries carry their own expiry so callers can use different TTLs for
+    different classes of keys. When the cache holds more than ``max_entries``
+    the least recently used entries are evicted. All operations are
+    thread-safe and every write is flushed to disk atomically, so the cache
+    survives between runs.
+
+    Several processes may share one file. Saves hold a file lock and merge
+    the entries other processes wrote since this one last read the file (the
+    file is only re-read when its mtime/size changed), and a miss picks up
+    entries other processes have saved in the meantime.
+    """
+
+    def __init__(self, path: str, default_ttl: float = 3600, max_entries: int = 1000):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, dict]" = OrderedDict()
+        # Keys changed/removed here since the last save; they win over the file
+        self._dirty: Set[str] = set()
+        self._deleted: Set[str] = set()
+        # (st_mtime_ns, st_size) of the file as last read or written
+        self._signature: Optional[tuple] = None
+        self._merge_from_disk()
+
+    def _stat(self) -> Optional[tuple]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _read_disk(self) -> Dict[str, dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("entries", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"⚠️  Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+
+    def _merge_from_disk(self):
+        """Fold in entries saved by other processes, if the file changed since it was last seen"""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return
+        now = time.time()
+        disk = self._read_disk()
+        # Saved entries missing from the file were deleted or evicted elsewhere
+        merged = {key: entry for key, entry in self._entries.items() if key in self._dirty or key in disk}
+        for key, entry in disk.items():
+            if key in self._dirty or key in self._deleted or entry.get("expires_at", 0) <= now:
+                continue
+            current = merged.get(key)
+            if current is None or entry.get("stored_at", 0) > current.get("stored_at", 0):
+                merged[key] = entry
+        self._entries = OrderedDict(sorted(merged.items(), key=lambda item: item[1].get("last_access", 0)))
+        self._signature = signature
+
+    def _save(self):
+        directory = os.path.dirname(self.path) or "."
+        os.makedirs(directory, exist_ok=True)
+        with file_lock(f"{self.path}.lock"):
+            self._merge_from_disk()
+            self._evict(time.time())
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".cache-", suffix=".tmp")
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump({"entries": self._entries}, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+            self._signature = self._stat()
+        self._dirty.clear()
+        self._deleted.clear()
+
+    def _evict(self, now: float):
+        for key in [k for k, entry in self._entries.items() if entry["expires_at"] <= now]:
+            del self._entries[key]
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return the cached value, or ``default`` if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                # Another process may have stored it since
+                self._merge_from_disk()
+                entry = self._entries.get(key)
+            if entry is None:
+                return default
+            now = time.time()
+            if entry["expires_at"] <= now:
+                del self._entries[key]
+                return default
+            entry["last_access"] = now
+            self._entries.move_to_end(key)
+            return entry["value"]
+
+    def contains(self, key: str) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None, persist: bool = True):
+        """Store a JSON-serializable value for ``ttl`` seconds (default_ttl if omitted)"""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {
+                "value": value,
+                "stored_at": now,
+                "expires_at": now + (self.default_ttl if ttl is None else ttl),
+                "last_access": now,
+            }
+            self._entries.move_to_end(key)
+            self._dirty.add(key)
+            self._deleted.discard(key)
+            self._evict(now)
+            if persist:
+                self._save()
+
+    def delete(self, key: str):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._dirty.discard(key)
+                self._deleted.add(key)
+                self._save()
+
+    def flush(self):
+        """Write pending entries (stored with persist=False) to disk"""
+        with self._lock:
+            self._evict(time.time())
+            self._save()
+
+    def clear(self):
+        with self._lock:
+            self._deleted.update(self._entries)
+            self._deleted.update(self._read_disk())
+            self._entries.clear()
+            self._dirty.clear()
+            self._save()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -27,6 +27,9 @@ class Settings(BaseSettings):
     # Redis Settings
     REDIS_URL: str = "redis://localhost:6379"
     REDIS_DB: int = 0
+    RESPONSE_CACHE_ENABLED: bool = True  # cache /markets responses for MARKET_DATA_UPDATE_INTERVAL
+    RESPONSE_CACHE_STALE_SECONDS: int = 300  # how long an expired response may be served while it is recomputed
+    RESPONSE_CACHE_LOCK_TIMEOUT: int = 30  # seconds before a crashed recompute's lock expires
     
     # API Keys
     ALPHA_VANTAGE_API_KEY: Optional[str] = None
@@ -37,6 +40,8 @@ class Settings(BaseSettings):
     AZURE_OPENAI_ENDPOINT: Optional[str] = None
     AZURE_OPENAI_API_VERSION: str = "2024-02-15-preview"
     AZURE_OPENAI_DEPLOYMENT_NAME: Optional[str] = None
+    AZURE_OPENAI_REQUESTS_PER_MINUTE: int = 60  # deployment RPM quota
+    AZURE_OPENAI_TOKENS_PER_MINUTE: int = 100000  # deployment TPM quota
     
     # JWT Settings
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
@@ -53,11 +58,32 @@ class Settings(BaseSettings):
     # Background Tasks
     CELERY_BROKER_URL: str = "redis://localhost:6379/1"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/2"
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # run tasks inline (tests / no broker)
+    CELERY_DEDUPE_TTL: int = 3600  # seconds a dedupe key outlives a crashed worker
     
     # Data Update Intervals (seconds)
     MARKET_DATA_UPDATE_INTERVAL: int = 60
     AI_INSIGHTS_UPDATE_INTERVAL: int = 900  # 15 minutes
     NEWS_UPDATE_INTERVAL: int = 600  # 10 minutes
+    SCHEDULER_ENABLED: bool = False  # run the refresh jobs inside the API process
+    SCHEDULER_STAGGER_SECONDS: float = 5.0  # delay between the first runs of each job
+    
+    # historical_data ingestion (daily bars)
+    HISTORY_BACKFILL_YEARS: int = 5
+    HISTORY_CHUNK_DAYS: int = 365  # days per backfill download/commit
+    HISTORY_UPDATE_INTERVAL: int = 3600  # seconds between incremental appends
+    
+    # Local OHLCV history (one CSV per symbol, only missing bars are downloaded)
+    PRICE_HISTORY_DIR: str = "./cache/price_history"
+    
+    # Memory-mapped OHLCV columns per (symbol, interval) read by the chart endpoints
+    SERIES_STORE_DIR: str = "./cache/series"
+    INDICATOR_MAX_TRACKS: int = 512  # (symbol, interval, indicator) running states kept in memory
+    
+    # Generator output served by /api/v1/markets/generated
+    GENERATED_DATA_DIR: str = "../frontend/public/data"
+    GENERATED_DATA_CACHE_CONTROL: str = "public, no-cache"  # always revalidate with If-None-Match
+    GENERATED_DATA_POLL_INTERVAL: float = 2.0  # seconds between change checks
     
     # Mock Data Settings
     USE_MOCK_DATA: bool = True  # Set to False when real APIs are configured
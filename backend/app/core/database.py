@@ -46,6 +46,22 @@ def get_db() -> Generator[Session, None, None]:
         db.close()
 
 
+def dialect_insert(table, bind=None):
+    """
+    INSERT construct for the engine's dialect, so callers can use
+    ``on_conflict_do_update`` / ``on_conflict_do_nothing`` on both SQLite and
+    PostgreSQL.
+    """
+    dialect = (bind or engine).dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported on {dialect}")
+    return insert(table)
+
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
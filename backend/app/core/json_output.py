@@ -0,0 +1,110 @@
+"""Atomic, compact JSON file output with precompressed .gz/.br siblings"""
+import gzip
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+try:
+    import brotli
+except ImportError:  # optional: only the .gz variant is written without it
+    brotli = None
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: only threads of this process are serialized
+    fcntl = None
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def encode_json(data: Any) -> bytes:
+    """Compact UTF-8 JSON encoding used for every published file"""
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def write_bytes_atomic(path: str, payload: bytes, mode: int = 0o644):
+    """Write ``payload`` to a temp file next to ``path`` and rename it into place"""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=os.path.basename(path))
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates 0600 files; published data must be readable by the web server
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _unchanged(path: str, payload: bytes) -> bool:
+    try:
+        if os.path.getsize(path) != len(payload):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == payload
+    except OSError:
+        return False
+
+
+def write_json(path: str, data: Any, precompress: bool = True) -> bytes:
+    """
+    Publish ``data`` as compact JSON at ``path`` and return the encoded bytes.
+
+    Readers never observe a partially written file: each file is written to a
+    temp file and renamed over the old one. With ``precompress`` the ``.gz``
+    (and ``.br`` when the brotli package is installed) variants are written
+    next to it for servers that serve precompressed files directly. Files
+    whose content did not change are left untouched, keeping their mtime
+    stable.
+    """
+    payload = encode_json(data)
+    variants = {}
+    if precompress:
+        variants[f"{path}.gz"] = lambda: gzip.compress(payload, compresslevel=9, mtime=0)
+        if brotli is not None:
+            variants[f"{path}.br"] = lambda: brotli.compress(payload, quality=11)
+
+    if _unchanged(path, payload):
+        # The JSON may be committed while its (gitignored) variants were never built
+        for variant_path, compress in variants.items():
+            if not os.path.exists(variant_path):
+                write_bytes_atomic(variant_path, compress())
+        return payload
+
+    for variant_path, compress in variants.items():
+        write_bytes_atomic(variant_path, compress())
+    write_bytes_atomic(path, payload)
+    return payload
+
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Exclusive lock shared by every thread and process that locks the same
+    ``path`` (created if missing), for read-modify-write of published files.
+    """
+    path = os.path.abspath(path)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(path, threading.Lock())
+
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
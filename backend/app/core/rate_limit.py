@@ -0,0 +1,106 @@
+"""Request + token rate limiting and retry helpers for async API clients"""
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+
+class TokenBucket:
+    """Continuously refilling bucket holding at most ``capacity`` units"""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.available = capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.available = min(self.capacity, self.available + (now - self._updated) * self.refill_per_second)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until ``amount`` units are available (0 if available now)"""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.available
+        return max(0.0, missing / self.refill_per_second)
+
+    def take(self, amount: float):
+        self.available -= min(amount, self.capacity)
+
+    def give_back(self, amount: float):
+        self.available = min(self.capacity, self.available + amount)
+
+
+class AsyncRateLimiter:
+    """
+    Shared limiter for an API with both a requests-per-minute and a
+    tokens-per-minute quota (e.g. Azure OpenAI).
+
+    Callers ``await acquire(estimated_tokens)`` before each request and report
+    the real usage with ``settle`` afterwards. A 429 answer should be passed to
+    ``pause`` so every caller backs off for the Retry-After period, not just
+    the one that hit it. The limiter holds no asyncio primitives, so one
+    instance can be reused across event loops.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests = TokenBucket(requests_per_minute, requests_per_minute / 60.0)
+        self.tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60.0)
+        self._paused_until = 0.0
+
+    async def acquire(self, tokens: int = 0):
+        while True:
+            now = time.monotonic()
+            wait = max(
+                self._paused_until - now,
+                self.requests.wait_time(1, now),
+                self.tokens.wait_time(tokens, now)
+            )
+            if wait <= 0:
+                self.requests.take(1)
+                self.tokens.take(tokens)
+                return
+            await asyncio.sleep(wait)
+
+    def settle(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real usage of a request is known"""
+        difference = estimated_tokens - actual_tokens
+        if difference > 0:
+            self.tokens.give_back(difference)
+        elif difference < 0:
+            self.tokens.take(-difference)
+
+    def pause(self, seconds: float):
+        """Hold back every caller for ``seconds`` (e.g. from a Retry-After header)"""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(headers) -> Optional[float]:
+    """Read Retry-After / retry-after-ms from response headers, in seconds"""
+    if headers is None:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000.0
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if not retry_after:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 60.0) -> float:
+    """Exponential backoff with full jitter for the given 0-based attempt"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
@@ -0,0 +1,187 @@
+"""Shared response cache with stale-while-revalidate and single-flight recomputation"""
+import asyncio
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+Compute = Callable[[], Awaitable[bytes]]
+
+
+def cache_key(route: str, **params) -> str:
+    """Route plus its query parameters in a canonical order, e.g. markets:all?active_only=True"""
+    query = "&".join(f"{name}={params[name]}" for name in sorted(params) if params[name] is not None)
+    return f"{route}?{query}" if query else route
+
+
+class ResponseCache:
+    """
+    Caches encoded responses for ``ttl`` seconds and keeps serving them for
+    up to ``stale`` seconds more while one caller recomputes.
+
+    Within a process, concurrent misses for a key share one in-flight
+    computation. Across processes a Redis lock (SET NX with a timeout) picks
+    the single recomputing worker; the others return the stale value, or wait
+    for the winner to publish when there is none. Without a reachable Redis
+    everything falls back to a process-local dict, so each process still
+    computes a key once per TTL.
+    """
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        ttl: Optional[float] = None,
+        stale: Optional[float] = None,
+        lock_timeout: Optional[float] = None
+    ):
+        self.url = settings.REDIS_URL if url is None else url
+        self.ttl = settings.MARKET_DATA_UPDATE_INTERVAL if ttl is None else ttl
+        self.stale = settings.RESPONSE_CACHE_STALE_SECONDS if stale is None else stale
+        self.lock_timeout = settings.RESPONSE_CACHE_LOCK_TIMEOUT if lock_timeout is None else lock_timeout
+        self._redis = None
+        self._redis_checked = False
+        # key -> (fresh_until, payload)
+        self._local: Dict[str, Tuple[float, bytes]] = {}
+        # key -> running recompute; holding it here also keeps the task alive
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    # ---------------------------------------------------------------------
+    # Storage
+    # ---------------------------------------------------------------------
+
+    async def _client(self):
+        if self._redis_checked:
+            return self._redis
+        self._redis_checked = True
+        if not self.url or not self.url.startswith(("redis://", "rediss://", "unix://")):
+            return None
+        try:
+            import redis.asyncio as redis
+
+            client = redis.Redis.from_url(
+                self.url,
+                db=settings.REDIS_DB,
+                socket_timeout=settings.EXTERNAL_API_TIMEOUT,
+                socket_connect_timeout=settings.EXTERNAL_API_TIMEOUT
+            )
+            await client.ping()
+            self._redis = client
+        except Exception as e:
+            print(f"⚠️ Response cache: Redis unavailable ({e}), using in-process cache")
+        return self._redis
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"marketpulse:cache:{key}"
+
+    async def _read(self, key: str) -> Optional[Tuple[float, bytes]]:
+        client = await self._client()
+        if client is not None:
+            try:
+                raw = await client.get(self._redis_key(key))
+            except Exception:
+                raw = None
+            if raw is not None:
+                fresh_until, _, payload = raw.partition(b"\n")
+                return float(fresh_until), payload
+
+        entry = self._local.get(key)
+        if entry is not None and entry[0] + self.stale < time.time():
+            self._local.pop(key, None)
+            return None
+        return entry
+
+    async def _write(self, key: str, payload: bytes):
+        fresh_until = time.time() + self.ttl
+        self._local[key] = (fresh_until, payload)
+        client = await self._client()
+        if client is not None:
+            try:
+                await client.set(
+                    self._redis_key(key),
+                    f"{fresh_until:.3f}\n".encode() + payload,
+                    ex=max(1, int(self.ttl + self.stale))
+                )
+            except Exception:
+                pass
+
+    async def _acquire(self, key: str) -> Optional[str]:
+        """Cross-process recompute lock; returns a token, or None if another worker holds it"""
+        client = await self._client()
+        token = uuid.uuid4().hex
+        if client is None:
+            return token
+        try:
+            if await client.set(self._redis_key(key) + ":lock", token, nx=True, ex=max(1, int(self.lock_timeout))):
+                return token
+            return None
+        except Exception:
+            return token
+
+    async def _release(self, key: str, token: str):
+        client = await self._client()
+        if client is None:
+            return
+        try:
+            await client.eval(self._RELEASE_SCRIPT, 1, self._redis_key(key) + ":lock", token)
+        except Exception:
+            pass
+
+    # ---------------------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------------------
+
+    async def _recompute(self, key: str, compute: Compute, stale: Optional[bytes]) -> bytes:
+        token = await self._acquire(key)
+        if token is None:
+            if stale is not None:
+                return stale
+            # Another worker is computing a cold key: wait for it, then fall back to computing here
+            deadline = time.time() + self.lock_timeout
+            while time.time() < deadline:
+                await asyncio.sleep(0.05)
+                entry = await self._read(key)
+                if entry is not None:
+                    return entry[1]
+        try:
+            payload = await compute()
+            await self._write(key, payload)
+            return payload
+        finally:
+            if token is not None:
+                await self._release(key, token)
+
+    async def get_or_compute(self, key: str, compute: Compute) -> bytes:
+        """Cached payload for ``key``; ``compute`` runs at most once per key at a time"""
+        entry = await self._read(key)
+        if entry is not None and entry[0] > time.time():
+            return entry[1]
+        stale = entry[1] if entry is not None else None
+
+        task = self._inflight.get(key)
+        if task is None:
+            # Detached from the request that started it: a caller that is cancelled
+            # (client disconnect, timeout) does not cancel the others' computation
+            task = asyncio.create_task(self._recompute(key, compute, stale))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._finish(key, done))
+        if stale is not None:
+            # Serve the stale copy right away; the refresh completes in the background
+            return stale
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Background refreshes may have no awaiter; mark a failure as retrieved
+            task.exception()
+
+
+response_cache = ResponseCache()
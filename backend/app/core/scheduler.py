@@ -0,0 +1,133 @@
+"""Asyncio interval scheduler for periodic refresh jobs"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class IntervalJob:
+    """A job run every ``interval`` seconds, first after ``initial_delay`` seconds"""
+    name: str
+    func: Callable[[], Any]
+    interval: float
+    initial_delay: Optional[float] = None
+    runs: int = 0
+    failures: int = 0
+    skipped: int = 0
+    last_started_at: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    running: bool = field(default=False, repr=False)
+
+
+class IntervalScheduler:
+    """
+    Runs each registered job on its own fixed-rate timeline.
+
+    - Jobs without an explicit ``initial_delay`` are staggered ``stagger``
+      seconds apart, so they do not all fire at startup.
+    - A job never overlaps itself: its next run starts only after the
+      current one has finished.
+    - A run that overshoots one or more slots skips them instead of
+      catching up with back-to-back runs; skipped slots are counted.
+
+    Coroutine functions run on the event loop, plain functions in a worker
+    thread. A failing run is logged and the job keeps its schedule.
+    """
+
+    def __init__(self, stagger: float = 5.0):
+        self.stagger = stagger
+        self.jobs: Dict[str, IntervalJob] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def add_job(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        interval: float,
+        initial_delay: Optional[float] = None
+    ) -> IntervalJob:
+        if name in self.jobs:
+            raise ValueError(f"Job '{name}' is already registered")
+        if interval <= 0:
+            raise ValueError(f"Job '{name}' needs a positive interval")
+        job = IntervalJob(name=name, func=func, interval=interval, initial_delay=initial_delay)
+        self.jobs[name] = job
+        return job
+
+    async def _run_once(self, job: IntervalJob):
+        job.running = True
+        job.last_started_at = time.time()
+        started = time.monotonic()
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                result = await job.func()
+            else:
+                result = await asyncio.to_thread(job.func)
+            if inspect.isawaitable(result):
+                await result
+            job.last_error = None
+        except Exception as e:
+            job.failures += 1
+            job.last_error = f"{e.__class__.__name__}: {e}"
+            print(f"❌ Scheduled job '{job.name}' failed: {job.last_error}")
+        finally:
+            job.runs += 1
+            job.running = False
+            job.last_duration = time.monotonic() - started
+
+    async def _run_job(self, job: IntervalJob, initial_delay: float):
+        loop = asyncio.get_running_loop()
+        next_run = loop.time() + initial_delay
+        while True:
+            await asyncio.sleep(max(0.0, next_run - loop.time()))
+            await self._run_once(job)
+
+            next_run += job.interval
+            now = loop.time()
+            if next_run < now:
+                missed = int((now - next_run) // job.interval) + 1
+                job.skipped += missed
+                next_run += missed * job.interval
+                print(f"⏭️  Scheduled job '{job.name}' overran, skipping {missed} run(s)")
+
+    def start(self):
+        """Start every job on the running event loop"""
+        if self._tasks:
+            return
+        for index, job in enumerate(self.jobs.values()):
+            delay = job.initial_delay if job.initial_delay is not None else index * self.stagger
+            self._tasks.append(asyncio.create_task(self._run_job(job, delay), name=f"job:{job.name}"))
+
+    async def stop(self):
+        """Cancel every job and wait for in-flight runs to unwind"""
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run_forever(self):
+        """Start the jobs and block until cancelled (standalone daemon mode)"""
+        self.start()
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            await self.stop()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": job.name,
+                "interval": job.interval,
+                "running": job.running,
+                "runs": job.runs,
+                "failures": job.failures,
+                "skipped": job.skipped,
+                "lastStartedAt": job.last_started_at,
+                "lastDuration": job.last_duration,
+                "lastError": job.last_error,
+            }
+            for job in self.jobs.values()
+        ]
@@ -0,0 +1,132 @@
+"""Small dependency-graph runner for pipelines of blocking and async steps"""
+import asyncio
+import inspect
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+
+@dataclass
+class StepTiming:
+    """Start/end offsets (seconds since the graph started) of one step"""
+    name: str
+    started_at: float
+    finished_at: float
+    status: str  # "ok", "failed", "skipped"
+
+    @property
+    def duration(self) -> float:
+        return self.finished_at - self.started_at
+
+
+@dataclass
+class GraphRun:
+    """Results and timings of one StepGraph execution"""
+    started_at: datetime
+    results: Dict[str, Any] = field(default_factory=dict)
+    timings: List[StepTiming] = field(default_factory=list)
+
+    @property
+    def total_seconds(self) -> float:
+        return max((t.finished_at for t in self.timings), default=0.0)
+
+    def format_timeline(self) -> str:
+        """Human readable timeline, one line per step in start order"""
+        lines = []
+        for timing in sorted(self.timings, key=lambda t: t.started_at):
+            lines.append(
+                f"   {timing.name:<24} {timing.started_at:7.2f}s → {timing.finished_at:7.2f}s "
+                f"({timing.duration:6.2f}s) {timing.status}"
+            )
+        return "\n".join(lines)
+
+
+class StepGraph:
+    """
+    Runs named steps as soon as the steps they depend on have finished.
+
+    Each step function receives its dependencies' results as keyword arguments
+    named after the dependency. Plain functions run in a worker thread,
+    coroutine functions run on the event loop.
+    """
+
+    def __init__(self):
+        self._steps: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], deps: Sequence[str] = ()) -> "StepGraph":
+        if name in self._steps:
+            raise ValueError(f"Duplicate step: {name}")
+        self._steps[name] = (func, tuple(deps))
+        return self
+
+    def _validate(self):
+        for name, (_, deps) in self._steps.items():
+            for dep in deps:
+                if dep not in self._steps:
+                    raise ValueError(f"Step '{name}' depends on unknown step '{dep}'")
+
+        # Kahn's algorithm - any step left over is part of a cycle
+        remaining = {name: set(deps) for name, (_, deps) in self._steps.items()}
+        while remaining:
+            ready = [name for name, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(f"Dependency cycle between steps: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+    async def run(self) -> GraphRun:
+        """
+        Execute the graph. If a step fails, steps depending on it are skipped,
+        independent steps still finish, and the first error is re-raised with
+        the partial GraphRun attached as ``exc.graph_run``.
+        """
+        self._validate()
+
+        run = GraphRun(started_at=datetime.now())
+        origin = time.perf_counter()
+        tasks: Dict[str, asyncio.Task] = {}
+        errors: List[BaseException] = []
+
+        async def execute(name: str):
+            func, deps = self._steps[name]
+            dep_results = {}
+            for dep in deps:
+                dep_results[dep] = await tasks[dep]
+
+            started = time.perf_counter() - origin
+            try:
+                if inspect.iscoroutinefunction(func):
+                    result = await func(**dep_results)
+                else:
+                    result = await asyncio.to_thread(func, **dep_results)
+                    if inspect.isawaitable(result):
+                        result = await result
+            except Exception as e:
+                run.timings.append(StepTiming(name, started, time.perf_counter() - origin, "failed"))
+                errors.append(e)
+                raise
+            run.timings.append(StepTiming(name, started, time.perf_counter() - origin, "ok"))
+            run.results[name] = result
+            return result
+
+        for name in self._steps:
+            tasks[name] = asyncio.ensure_future(execute(name))
+
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+        recorded = {t.name for t in run.timings}
+        for name, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, BaseException) and name not in recorded:
+                now = time.perf_counter() - origin
+                run.timings.append(StepTiming(name, now, now, "skipped"))
+
+        if errors:
+            error = errors[0]
+            error.graph_run = run
+            raise error
+
+        return run
+
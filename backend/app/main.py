@@ -1,10 +1,14 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
+import asyncio
 
 from app.core.config import settings
+from app.core.database import create_tables
 from app.api.v1.api import api_router
+from app.services.generated_data import generated_data_store
+from app.services.refresh_jobs import build_scheduler
 
 
 # Application lifespan manager
@@ -12,9 +16,24 @@ from app.api.v1.api import api_router
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 MarketPulse API starting up...")
+    if not settings.USE_MOCK_DATA:
+        await asyncio.to_thread(create_tables)
+    await asyncio.to_thread(generated_data_store.reload)
+    watcher = asyncio.create_task(generated_data_store.watch())
+    scheduler = None
+    if settings.SCHEDULER_ENABLED:
+        scheduler = build_scheduler()
+        scheduler.start()
+        print(f"⏰ Scheduler started: {', '.join(scheduler.jobs)}")
+    app.state.scheduler = scheduler
     yield
     # Shutdown
     print("💫 MarketPulse API shutting down...")
+    if scheduler is not None:
+        await scheduler.stop()
+    watcher.cancel()
+    with suppress(asyncio.CancelledError):
+        await watcher
 
 
 # Create FastAPI instance
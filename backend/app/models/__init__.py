@@ -1,11 +1,13 @@
 # Import all models to make them available
-from app.models.market import MarketData, HistoricalData
+from app.models.market import MarketData, HistoricalData, HistoryBackfillState, OHLCBar
 from app.models.ai_insights import AIInsight
 from app.models.user import User
 
 __all__ = [
     "MarketData",
     "HistoricalData", 
+    "HistoryBackfillState",
+    "OHLCBar",
     "AIInsight",
     "User"
 ]
\ No newline at end of file
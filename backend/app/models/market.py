@@ -57,6 +57,35 @@ class MarketData(Base):
         return f"<MarketData(symbol='{self.symbol}', price={self.price})>"
 
 
+class OHLCBar(Base):
+    """Intraday OHLCV bars: raw 1m bars plus incrementally maintained rollups"""
+    
+    __tablename__ = "ohlc_bars"
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Series Key
+    symbol = Column(String(20), nullable=False)
+    interval = Column(String(5), nullable=False)  # 1m, 5m, 15m, 1h
+    bucket_start = Column(DateTime(timezone=True), nullable=False)
+    
+    # OHLCV Data
+    open = Column(Float, nullable=False)
+    high = Column(Float, nullable=False)
+    low = Column(Float, nullable=False)
+    close = Column(Float, nullable=False)
+    volume = Column(Float, default=0.0)
+    
+    # Indexes for performance
+    __table_args__ = (
+        Index('idx_symbol_interval_bucket', 'symbol', 'interval', 'bucket_start', unique=True),
+    )
+    
+    def __repr__(self):
+        return f"<OHLCBar(symbol='{self.symbol}', interval='{self.interval}', bucket_start='{self.bucket_start}')>"
+
+
 class HistoricalData(Base):
     """Historical market data model for storing OHLCV data"""
     
@@ -94,6 +123,27 @@ class HistoricalData(Base):
         return f"<HistoricalData(symbol='{self.symbol}', date='{self.date}', close={self.close})>"
 
 
+class HistoryBackfillState(Base):
+    """Marks symbols whose upstream daily history ends at their oldest stored bar"""
+    
+    __tablename__ = "history_backfill_state"
+    
+    # Primary Key
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Asset Reference
+    symbol = Column(String(20), unique=True, index=True, nullable=False)
+    
+    # Oldest stored bar when the source returned nothing older
+    exhausted_at = Column(DateTime(timezone=True), nullable=False)
+    
+    # Timestamps
+    checked_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<HistoryBackfillState(symbol='{self.symbol}', exhausted_at='{self.exhausted_at}')>"
+
+
 class NewsArticle(Base):
     """News articles related to market assets"""
     
@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from pydantic import BaseModel, Field
 
@@ -74,6 +74,29 @@ class HistoricalDataResponse(BaseModel):
     data: List[ChartDataPoint]
     time_range: str
     total_points: int
+    indicators: Optional[Dict[str, List[Optional[float]]]] = Field(
+        None, description="Indicator outputs parallel to data (null during warm-up)"
+    )
+
+
+class AssetStatisticsResponse(BaseModel):
+    """Response model for asset statistics (percentages are in percent)"""
+    symbol: str
+    as_of: Optional[datetime] = None
+    bars: int
+    last_price: Optional[float] = None
+    return_1d: Optional[float] = None
+    return_1m: Optional[float] = None
+    return_3m: Optional[float] = None
+    return_1y: Optional[float] = None
+    volatility_20d: Optional[float] = Field(None, description="Annualized volatility of the last 20 daily log returns")
+    volatility_annualized: Optional[float] = Field(None, description="Annualized volatility over the whole window")
+    max_drawdown: Optional[float] = None
+    current_drawdown: Optional[float] = None
+    week_52_high: Optional[float] = None
+    week_52_low: Optional[float] = None
+    atr_14: Optional[float] = Field(None, description="Average true range (Wilder, 14 days)")
+    atr_percent: Optional[float] = None
 
 
 class MarketOverviewResponse(BaseModel):
@@ -0,0 +1,117 @@
+"""Vectorized risk/return statistics over daily OHLCV series"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.services.chart_series import ChartSeries
+
+
+TRADING_DAYS_PER_YEAR = 252
+VOLATILITY_WINDOW = 20
+ATR_WINDOW = 14
+# Return horizons in trading days
+RETURN_HORIZONS = {"return_1d": 1, "return_1m": 21, "return_3m": 63, "return_1y": 252}
+WEEK_52_NS = 365 * 86_400 * 1_000_000_000
+
+
+def _pct(value) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value) * 100, 4)
+
+
+def _round(value, digits: int = 6) -> Optional[float]:
+    return None if value is None or not np.isfinite(value) else round(float(value), digits)
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    """Sample standard deviation of every full ``window`` via cumulative sums"""
+    if len(values) < window:
+        return np.empty(0)
+    csum = np.cumsum(np.insert(values, 0, 0.0))
+    csum2 = np.cumsum(np.insert(values * values, 0, 0.0))
+    total = csum[window:] - csum[:-window]
+    total2 = csum2[window:] - csum2[:-window]
+    variance = (total2 - total * total / window) / (window - 1)
+    return np.sqrt(np.maximum(variance, 0.0))
+
+
+def wilder_average(values: np.ndarray, window: int) -> float:
+    """
+    Last value of Wilder's smoothing (seeded with the mean of the first
+    ``window`` values), evaluated in closed form instead of a Python loop.
+    """
+    if len(values) < window:
+        return float("nan")
+    alpha = 1.0 / window
+    rest = values[window:]
+    decay = (1.0 - alpha) ** np.arange(len(rest) - 1, -1, -1)
+    return float(values[:window].mean() * (1.0 - alpha) ** len(rest) + alpha * np.dot(decay, rest))
+
+
+def true_range(series: ChartSeries) -> np.ndarray:
+    prev_close = series.close[:-1]
+    high, low = series.high[1:], series.low[1:]
+    return np.maximum.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+
+
+def compute_statistics(series: ChartSeries) -> Dict[str, Any]:
+    """Every statistic for one symbol from its daily bars, using array operations only"""
+    n = len(series)
+    close = np.asarray(series.close, dtype=np.float64)
+    if n == 0:
+        return {"bars": 0}
+
+    log_returns = np.diff(np.log(close))
+    stats: Dict[str, Any] = {"bars": n, "last_price": _round(close[-1])}
+
+    for name, horizon in RETURN_HORIZONS.items():
+        stats[name] = _pct(close[-1] / close[-1 - horizon] - 1.0) if n > horizon else None
+
+    annualize = np.sqrt(TRADING_DAYS_PER_YEAR)
+    rolling = rolling_std(log_returns, VOLATILITY_WINDOW)
+    stats["volatility_20d"] = _pct(rolling[-1] * annualize) if len(rolling) else None
+    stats["volatility_annualized"] = _pct(log_returns.std(ddof=1) * annualize) if len(log_returns) > 1 else None
+
+    drawdown = close / np.maximum.accumulate(close) - 1.0
+    stats["max_drawdown"] = _pct(drawdown.min())
+    stats["current_drawdown"] = _pct(drawdown[-1])
+
+    start = int(np.searchsorted(series.timestamps, series.timestamps[-1] - WEEK_52_NS, side="left"))
+    stats["week_52_high"] = _round(np.max(series.high[start:]))
+    stats["week_52_low"] = _round(np.min(series.low[start:]))
+
+    atr = wilder_average(true_range(series), ATR_WINDOW) if n > 1 else float("nan")
+    stats["atr_14"] = _round(atr)
+    stats["atr_percent"] = _pct(atr / close[-1])
+    return stats
+
+
+class StatisticsEngine:
+    """
+    Memoizes compute_statistics per symbol. An entry is reused while the
+    series ends on the same bar with the same close (the last daily bar is
+    rewritten in place while its session is still open).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: Dict[str, Tuple[tuple, Dict[str, Any]]] = {}
+
+    @staticmethod
+    def _key(series: ChartSeries) -> tuple:
+        if not len(series):
+            return (0,)
+        return (len(series), int(series.timestamps[-1]), float(series.close[-1]))
+
+    def get(self, symbol: str, series: ChartSeries) -> Dict[str, Any]:
+        key = self._key(series)
+        cached = self._cache.get(symbol)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        stats = compute_statistics(series)
+        with self._lock:
+            self._cache[symbol] = (key, stats)
+        return stats
+
+
+statistics_engine = StatisticsEngine()
@@ -0,0 +1,117 @@
+"""Column-oriented OHLCV series used internally by the chart endpoints"""
+import struct
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.schemas.market import ChartDataPoint
+
+
+# Packed layout: 16-byte little-endian header (magic, version, column count,
+# point count) followed by one contiguous column per field: int64 epoch
+# milliseconds, then float64 open, high, low, close, volume. The header keeps
+# every column 8-byte aligned so clients can view it as a typed array directly.
+PACKED_MAGIC = b"MPCS"
+PACKED_VERSION = 1
+PACKED_HEADER = struct.Struct("<4sHHQ")
+PACKED_MEDIA_TYPE = "application/vnd.marketpulse.chart+octet-stream"
+
+
+def json_floats(values: np.ndarray) -> list:
+    # NaN is not valid JSON; the packed format keeps it as-is
+    finite = np.isfinite(values)
+    if finite.all():
+        return values.tolist()
+    return [value if ok else None for value, ok in zip(values.tolist(), finite.tolist())]
+
+
+@dataclass(frozen=True)
+class ChartSeries:
+    """
+    One array per field, all the same length and sorted by time.
+
+    ``timestamps`` are int64 nanoseconds since the epoch (UTC). Working on
+    whole arrays keeps slicing, downsampling and serialization vectorized
+    instead of building one Python object per bar.
+    """
+    timestamps: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    volume: np.ndarray
+
+    FIELDS = ("timestamps", "open", "high", "low", "close", "volume")
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @classmethod
+    def empty(cls) -> "ChartSeries":
+        return cls(np.empty(0, dtype=np.int64), *(np.empty(0, dtype=np.float64) for _ in range(5)))
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence]) -> "ChartSeries":
+        """Build from (date, open, high, low, close, volume) rows, e.g. a SQL result"""
+        rows = list(rows)
+        if not rows:
+            return cls.empty()
+        dates, opens, highs, lows, closes, volumes = zip(*rows)
+        return cls(
+            timestamps=pd.to_datetime(list(dates), utc=True).as_unit("ns").asi8,
+            open=np.asarray(opens, dtype=np.float64),
+            high=np.asarray(highs, dtype=np.float64),
+            low=np.asarray(lows, dtype=np.float64),
+            close=np.asarray(closes, dtype=np.float64),
+            volume=np.nan_to_num(np.asarray(volumes, dtype=np.float64)),
+        )
+
+    def take(self, indices: np.ndarray) -> "ChartSeries":
+        return ChartSeries(*(getattr(self, name)[indices] for name in self.FIELDS))
+
+    def iso_timestamps(self) -> np.ndarray:
+        return np.datetime_as_string(self.timestamps.astype("datetime64[ns]"), unit="s", timezone="UTC")
+
+    def to_points(self) -> List[ChartDataPoint]:
+        timestamps = self.iso_timestamps()
+        return [
+            ChartDataPoint(
+                timestamp=timestamp,
+                date=timestamp[:10],
+                price=close,
+                volume=volume,
+                open=open_price,
+                high=high,
+                low=low,
+                close=close
+            )
+            for timestamp, open_price, high, low, close, volume in zip(
+                timestamps.tolist(), self.open.tolist(), self.high.tolist(),
+                self.low.tolist(), self.close.tolist(), self.volume.tolist()
+            )
+        ]
+
+    def epoch_millis(self) -> np.ndarray:
+        return self.timestamps // 1_000_000
+
+    def to_columns(self) -> Dict[str, Any]:
+        """Parallel arrays keyed by field; timestamps are epoch milliseconds"""
+        columns = {"timestamps": self.epoch_millis().tolist()}
+        for name in self.FIELDS[1:]:
+            columns[name] = json_floats(getattr(self, name))
+        return columns
+
+    def to_packed(self, extra: Optional[Dict[str, np.ndarray]] = None) -> bytes:
+        """
+        Binary encoding described by PACKED_HEADER; see the module constants
+        for the layout. ``extra`` float64 columns (e.g. indicators) follow
+        volume in the given order and are included in the column count.
+        """
+        extra = extra or {}
+        header = PACKED_HEADER.pack(PACKED_MAGIC, PACKED_VERSION, len(self.FIELDS) + len(extra), len(self))
+        columns = [self.epoch_millis().astype("<i8").tobytes()]
+        columns += [getattr(self, name).astype("<f8").tobytes() for name in self.FIELDS[1:]]
+        columns += [np.asarray(values, dtype="<f8").tobytes() for values in extra.values()]
+        return header + b"".join(columns)
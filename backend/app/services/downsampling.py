@@ -0,0 +1,119 @@
+"""Shape-preserving downsampling of chart series"""
+from typing import Optional, Tuple
+
+import numpy as np
+
+from app.services.chart_series import ChartSeries
+
+
+DOWNSAMPLE_METHODS = ("lttb", "ohlc")
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of ``threshold`` points that keep
+    the visual shape of (x, y). The first and last points are always kept.
+
+    Each bucket is scored with array operations over the whole bucket; only
+    the walk over the ``threshold`` buckets is a Python loop, because each
+    choice depends on the previous one.
+    """
+    n = len(x)
+    if threshold >= n:
+        return np.arange(n)
+    if threshold < 3:
+        return np.array([0, n - 1], dtype=np.int64)
+
+    x = x.astype(np.float64)
+    y = y.astype(np.float64)
+    # Bucket edges over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    # Mean of every bucket up front (used as the third triangle vertex)
+    counts = np.diff(edges)
+    mean_x = np.add.reduceat(x[1:n - 1], edges[:-1] - 1) / counts
+    mean_y = np.add.reduceat(y[1:n - 1], edges[:-1] - 1) / counts
+    mean_x = np.append(mean_x, x[n - 1])
+    mean_y = np.append(mean_y, y[n - 1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        bx, by = x[start:end], y[start:end]
+        cx, cy = mean_x[bucket + 1], mean_y[bucket + 1]
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[bucket + 1] = a
+    return selected
+
+
+def ohlc_envelope(series: ChartSeries, threshold: int) -> ChartSeries:
+    """
+    Merge consecutive bars into ``threshold`` buckets: open=first, high=max,
+    low=min, close=last, volume=sum. Every extreme of the original series
+    survives, which LTTB on closes alone does not guarantee for candles.
+    """
+    n = len(series)
+    if threshold >= n:
+        return series
+
+    return merge_runs(series, _envelope_starts(n, threshold))
+
+
+def _envelope_starts(n: int, threshold: int) -> np.ndarray:
+    return np.unique(np.linspace(0, n, threshold, endpoint=False).astype(np.int64))
+
+
+def merge_runs(series: ChartSeries, starts: np.ndarray) -> ChartSeries:
+    """Merge the runs of bars beginning at each index in ``starts`` into one bar each"""
+    ends = np.append(starts[1:], len(series)) - 1
+    return ChartSeries(
+        timestamps=series.timestamps[starts],
+        open=series.open[starts],
+        high=np.maximum.reduceat(series.high, starts),
+        low=np.minimum.reduceat(series.low, starts),
+        close=series.close[ends],
+        volume=np.add.reduceat(series.volume, starts),
+    )
+
+
+def resample_ohlc(series: ChartSeries, step_ns: int) -> ChartSeries:
+    """
+    Aggregate bars into fixed UTC-aligned buckets of ``step_ns`` nanoseconds.
+    Each output timestamp is its bucket start.
+    """
+    if not len(series):
+        return series
+    buckets = series.timestamps - series.timestamps % step_ns
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    merged = merge_runs(series, starts)
+    return ChartSeries(buckets[starts], merged.open, merged.high, merged.low, merged.close, merged.volume)
+
+
+def downsample_with_positions(
+    series: ChartSeries, max_points: Optional[int], method: str = "lttb"
+) -> Tuple[ChartSeries, np.ndarray]:
+    """
+    Like ``downsample``, also returning for each output point the index of the
+    input bar whose per-bar values (e.g. indicators) it should carry: the
+    selected bar for LTTB, the last bar of each merged run for OHLC.
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    n = len(series)
+    if max_points is None or n <= max_points:
+        return series, np.arange(n)
+    if method == "ohlc":
+        starts = _envelope_starts(n, max_points)
+        return merge_runs(series, starts), np.append(starts[1:], n) - 1
+    indices = lttb_indices(series.timestamps, series.close, max_points)
+    return series.take(indices), indices
+
+
+def downsample(series: ChartSeries, max_points: int, method: str = "lttb") -> ChartSeries:
+    """Reduce ``series`` to at most ``max_points`` points with the given method"""
+    return downsample_with_positions(series, max_points, method)[0]
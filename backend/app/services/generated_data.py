@@ -0,0 +1,187 @@
+"""In-memory snapshot of the generator's published JSON documents, hot-reloaded on change"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from app.core.config import settings
+from app.services.market_publisher import MANIFEST_FILENAME, SECTIONS, section_path
+
+
+_MARKET_KEY = re.compile(r"^[a-z0-9_]+$")
+
+
+@dataclass(frozen=True)
+class GeneratedDocument:
+    """Raw and parsed content of a published file plus the validators used for HTTP caching"""
+    content: bytes
+    data: Any
+    sha256: str
+    mtime: float
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
+
+
+def document_path(market_key: Optional[str] = None, section: Optional[str] = None) -> str:
+    """
+    Relative path of a published document.
+
+    No arguments gives the manifest, a market key alone its combined
+    ``<market>_data.json`` and a market key plus section its shard. Raises
+    ValueError for anything else so request input never reaches the filesystem
+    unchecked.
+    """
+    if market_key is None:
+        return MANIFEST_FILENAME
+    if not _MARKET_KEY.match(market_key):
+        raise ValueError(f"Invalid market key: {market_key}")
+    if section is None:
+        return f"{market_key}_data.json"
+    if section not in SECTIONS:
+        raise ValueError(f"Unknown section: {section}")
+    return section_path(market_key, section)
+
+
+Signature = Dict[str, Tuple[int, int]]
+
+
+class GeneratedDataStore:
+    """
+    Serves files from the generator output directory out of an immutable snapshot.
+
+    ``watch`` polls the directory's (mtime, size) signature. Once a change has
+    been stable for one poll interval (so a generator run that is still
+    writing shards is not picked up halfway), the changed files are parsed in
+    a worker thread and a new read-only snapshot replaces the old one in a
+    single assignment. Readers only ever look up the current snapshot: they
+    never block on a reload, never see a half-applied reload, and do no disk
+    I/O. Files that fail to parse keep their previous version until they
+    change again.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.GENERATED_DATA_DIR
+        self._reload_lock = threading.Lock()
+        self._snapshot: Optional[Mapping[str, GeneratedDocument]] = None
+        self._signature: Signature = {}
+        self._invalid: Signature = {}
+
+    def _scan(self) -> Signature:
+        signature = {}
+        for root, dirs, files in os.walk(self.directory):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if not name.endswith(".json") or name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                relative_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+                signature[relative_path] = (stat.st_mtime_ns, stat.st_size)
+        return signature
+
+    def _load(self, relative_path: str) -> GeneratedDocument:
+        path = os.path.join(self.directory, relative_path)
+        with open(path, 'rb') as f:
+            content = f.read()
+        mtime = os.path.getmtime(path)
+        data = json.loads(content)
+        return GeneratedDocument(
+            content=content,
+            data=data,
+            sha256=hashlib.sha256(content).hexdigest(),
+            mtime=mtime
+        )
+
+    def reload(self, signature: Optional[Signature] = None) -> bool:
+        """Re-read changed files and swap in a new snapshot. Returns True if anything changed."""
+        with self._reload_lock:
+            signature = self._scan() if signature is None else signature
+            if self._snapshot is not None and signature == self._signature:
+                return False
+
+            previous = self._snapshot or {}
+            loaded_signature = dict(signature)
+            documents = {}
+            for relative_path, file_signature in signature.items():
+                document = previous.get(relative_path)
+                changed = document is None or self._signature.get(relative_path) != file_signature
+                if changed and self._invalid.get(relative_path) != file_signature:
+                    try:
+                        document = self._load(relative_path)
+                        self._invalid.pop(relative_path, None)
+                    except ValueError as e:
+                        # Invalid content: keep the previous version until the file changes again
+                        print(f"⚠️  Skipping generated file {relative_path}: {e}")
+                        self._invalid[relative_path] = file_signature
+                    except OSError as e:
+                        # Vanished or unreadable: keep the old signature so the next poll retries
+                        print(f"⚠️  Could not read generated file {relative_path}: {e}")
+                        loaded_signature.pop(relative_path)
+                        if relative_path in self._signature:
+                            loaded_signature[relative_path] = self._signature[relative_path]
+                if document is not None:
+                    documents[relative_path] = document
+
+            self._signature = loaded_signature
+            self._snapshot = MappingProxyType(documents)
+            return True
+
+    @property
+    def snapshot(self) -> Mapping[str, GeneratedDocument]:
+        snapshot = self._snapshot
+        if snapshot is None:
+            # Not started by the app lifespan (e.g. scripts); load once on first use
+            self.reload()
+            snapshot = self._snapshot
+        return snapshot
+
+    def get(self, relative_path: str) -> Optional[GeneratedDocument]:
+        """Return the document at ``relative_path`` from the current snapshot"""
+        return self.snapshot.get(relative_path)
+
+    async def watch(self, poll_interval: Optional[float] = None):
+        """Poll for changes until cancelled, reloading once a change has settled"""
+        poll_interval = settings.GENERATED_DATA_POLL_INTERVAL if poll_interval is None else poll_interval
+        pending: Optional[Signature] = None
+        while True:
+            await asyncio.sleep(poll_interval)
+            try:
+                signature = await asyncio.to_thread(self._scan)
+                if signature == self._signature:
+                    pending = None
+                elif signature == pending:
+                    if await asyncio.to_thread(self.reload, signature):
+                        print(f"🔄 Reloaded generated data ({len(signature)} files)")
+                    pending = None
+                else:
+                    pending = signature
+            except Exception as e:
+                print(f"⚠️  Generated data watcher error: {e}")
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header against a strong ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+generated_data_store = GeneratedDataStore()
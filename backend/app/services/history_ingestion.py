@@ -0,0 +1,254 @@
+"""Daily OHLCV ingestion into historical_data: chunked backfill plus incremental append"""
+import csv
+import io
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.market import HistoricalData, HistoryBackfillState
+from app.services.chart_series import ChartSeries
+from app.services.price_feed import download_histories
+from app.services.series_store import series_store
+
+
+COPY_COLUMNS = ("symbol", "date", "open", "high", "low", "close", "volume", "adj_close")
+
+
+def _as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+class HistoryIngestor:
+    """
+    Keeps historical_data filled with daily bars for a set of symbols.
+
+    ``backfill`` walks backwards from the oldest stored bar in ``chunk_days``
+    windows until ``years`` of history exist, committing after every chunk so
+    an interrupted run resumes from where it stopped. When the source has
+    nothing older, that is recorded in history_backfill_state and the symbol
+    is skipped until its oldest stored bar changes. ``append`` resumes any
+    unfinished backfill, then fetches only the bars after the newest stored
+    one (re-fetching that last bar, which may have been partial). Both find their starting point per symbol with one
+    grouped query over idx_symbol_date and download every symbol that shares a
+    window in a single batched request.
+    """
+
+    def __init__(self, db: Session, years: Optional[int] = None, chunk_days: Optional[int] = None):
+        self.db = db
+        self.years = settings.HISTORY_BACKFILL_YEARS if years is None else years
+        self.chunk_days = settings.HISTORY_CHUNK_DAYS if chunk_days is None else chunk_days
+
+    # ---------------------------------------------------------------------
+    # Index lookups
+    # ---------------------------------------------------------------------
+
+    def load(self, symbol: str, start: Optional[datetime] = None) -> ChartSeries:
+        """Stored daily bars for one symbol from ``start`` on"""
+        query = select(
+            HistoricalData.date, HistoricalData.open, HistoricalData.high,
+            HistoricalData.low, HistoricalData.close, HistoricalData.volume
+        ).where(HistoricalData.symbol == symbol)
+        if start is not None:
+            query = query.where(HistoricalData.date >= start)
+        return ChartSeries.from_rows(self.db.execute(query.order_by(HistoricalData.date)))
+
+    def date_bounds(self, symbols: Iterable[str]) -> Dict[str, Tuple[datetime, datetime]]:
+        """(oldest, newest) stored bar per symbol; symbols without data are left out"""
+        query = (
+            select(HistoricalData.symbol, func.min(HistoricalData.date), func.max(HistoricalData.date))
+            .where(HistoricalData.symbol.in_(list(symbols)))
+            .group_by(HistoricalData.symbol)
+        )
+        return {symbol: (_as_utc(oldest), _as_utc(newest)) for symbol, oldest, newest in self.db.execute(query)}
+
+    def exhausted(self, symbols: Iterable[str]) -> Dict[str, datetime]:
+        """Oldest stored bar at the time the source ran out, per symbol"""
+        query = select(HistoryBackfillState.symbol, HistoryBackfillState.exhausted_at).where(
+            HistoryBackfillState.symbol.in_(list(symbols))
+        )
+        return {symbol: _as_utc(exhausted_at) for symbol, exhausted_at in self.db.execute(query)}
+
+    def _mark_exhausted(self, symbol: str, oldest: datetime):
+        stmt = dialect_insert(HistoryBackfillState.__table__, self.db.get_bind()).values(
+            symbol=symbol, exhausted_at=oldest, checked_at=datetime.now(timezone.utc)
+        )
+        self.db.execute(stmt.on_conflict_do_update(
+            index_elements=[HistoryBackfillState.symbol],
+            set_={"exhausted_at": stmt.excluded.exhausted_at, "checked_at": stmt.excluded.checked_at}
+        ))
+
+    def needs_backfill(self, symbols: Iterable[str]) -> List[str]:
+        """Symbols with less than ``years`` of history whose source is not known to be exhausted"""
+        symbols = list(dict.fromkeys(symbols))
+        target = datetime.now(timezone.utc).date() - timedelta(days=365 * self.years)
+        bounds = self.date_bounds(symbols)
+        exhausted = self.exhausted(symbols)
+        return [
+            symbol for symbol in symbols
+            if symbol not in bounds
+            or (bounds[symbol][0].date() > target and exhausted.get(symbol) != bounds[symbol][0])
+        ]
+
+    # ---------------------------------------------------------------------
+    # Bulk writes
+    # ---------------------------------------------------------------------
+
+    @staticmethod
+    def _rows(symbol: str, frame: pd.DataFrame) -> List[dict]:
+        frame = frame.dropna(subset=["Open", "High", "Low", "Close"])
+        index = pd.to_datetime(frame.index, utc=True)
+        volumes = frame["Volume"].fillna(0.0) if "Volume" in frame else pd.Series(0.0, index=frame.index)
+        adj_close = frame["Adj Close"] if "Adj Close" in frame else pd.Series(None, index=frame.index)
+        return [
+            {
+                "symbol": symbol,
+                "date": timestamp.to_pydatetime(),
+                "open": float(o),
+                "high": float(h),
+                "low": float(l),
+                "close": float(c),
+                "volume": float(v),
+                "adj_close": None if pd.isna(a) else float(a),
+            }
+            for timestamp, o, h, l, c, v, a in zip(
+                index, frame["Open"], frame["High"], frame["Low"], frame["Close"], volumes, adj_close
+            )
+        ]
+
+    def _copy_rows(self, rows: List[dict]):
+        """PostgreSQL COPY FROM STDIN; callers guarantee the rows do not exist yet"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow(["" if row[c] is None else row[c] for c in COPY_COLUMNS])
+        buffer.seek(0)
+
+        cursor = self.db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {HistoricalData.__tablename__} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer
+            )
+        finally:
+            cursor.close()
+
+    def bulk_insert(self, rows: List[dict]) -> int:
+        """Insert rows with COPY on PostgreSQL and a single executemany elsewhere"""
+        if not rows:
+            return 0
+        if self.db.get_bind().dialect.name == "postgresql":
+            self._copy_rows(rows)
+        else:
+            stmt = dialect_insert(HistoricalData.__table__, self.db.get_bind()).on_conflict_do_nothing(
+                index_elements=[HistoricalData.symbol, HistoricalData.date]
+            )
+            self.db.execute(stmt, rows)
+        return len(rows)
+
+    # ---------------------------------------------------------------------
+    # Ingestion
+    # ---------------------------------------------------------------------
+
+    def _download(self, windows: Dict[str, Tuple[date, date]]) -> Dict[str, pd.DataFrame]:
+        """Download each (start, end) window once for every symbol that needs it"""
+        by_window: Dict[Tuple[date, date], List[str]] = {}
+        for symbol, window in windows.items():
+            by_window.setdefault(window, []).append(symbol)
+
+        frames = {}
+        for (start, end), symbols in by_window.items():
+            frames.update(download_histories(symbols, interval="1d", start=start, end=end))
+        return frames
+
+    def backfill(self, symbols: Iterable[str], max_chunks: Optional[int] = None) -> Dict[str, int]:
+        """Fill history backwards to ``years`` ago, one committed chunk at a time"""
+        symbols = list(dict.fromkeys(symbols))
+        today = datetime.now(timezone.utc).date()
+        target = today - timedelta(days=365 * self.years)
+        inserted = {symbol: 0 for symbol in symbols}
+        bounds = self.date_bounds(symbols)
+        # Known-exhausted symbols are skipped while their oldest bar is unchanged
+        exhausted = {
+            symbol for symbol, oldest in self.exhausted(symbols).items()
+            if symbol in bounds and bounds[symbol][0] == oldest
+        }
+
+        chunks = 0
+        while max_chunks is None or chunks < max_chunks:
+            bounds = self.date_bounds(symbols)
+            windows = {}
+            for symbol in symbols:
+                if symbol in exhausted:
+                    continue
+                # yfinance treats ``end`` as exclusive, so the oldest stored bar is not re-fetched
+                end = bounds[symbol][0].date() if symbol in bounds else today + timedelta(days=1)
+                if end <= target:
+                    continue
+                windows[symbol] = (max(target, end - timedelta(days=self.chunk_days)), end)
+            if not windows:
+                break
+
+            frames = self._download(windows)
+            for symbol in windows:
+                frame = frames.get(symbol)
+                if frame is not None and not frame.empty:
+                    inserted[symbol] += self.bulk_insert(self._rows(symbol, frame))
+
+            # A chunk that added no older bar (empty, price-less rows or only
+            # conflicts) means there is nothing older upstream, e.g. before listing;
+            # re-requesting the same window would never make progress
+            after = self.date_bounds(list(windows))
+            for symbol in windows:
+                oldest = after[symbol][0] if symbol in after else None
+                if oldest is None or (symbol in bounds and oldest >= bounds[symbol][0]):
+                    exhausted.add(symbol)
+                    if oldest is not None:
+                        self._mark_exhausted(symbol, oldest)
+            self.db.commit()
+            chunks += 1
+
+        # Older bars were added, so the append-only column files are rebuilt
+        for symbol, count in inserted.items():
+            if count:
+                series_store.replace(symbol, "1d", self.load(symbol))
+        return inserted
+
+    def append(self, symbols: Iterable[str]) -> Dict[str, int]:
+        """Fetch only bars newer than the newest stored one; unfinished backfills are resumed first"""
+        symbols = list(dict.fromkeys(symbols))
+        bounds = self.date_bounds(symbols)
+        pending = self.needs_backfill(symbols)
+        inserted = self.backfill(pending) if pending else {}
+
+        windows = {s: (bounds[s][1].date(), None) for s in symbols if s in bounds}
+        if not windows:
+            return inserted
+
+        frames = self._download(windows)
+        replaced_from = {}
+        for symbol, (start, _) in windows.items():
+            frame = frames.get(symbol)
+            if frame is None or frame.empty:
+                inserted.setdefault(symbol, 0)
+                continue
+            rows = self._rows(symbol, frame)
+            replaced_from[symbol] = min(row["date"] for row in rows)
+            # Replace the newest stored bar(s) in the same transaction: the last bar may have been partial
+            self.db.execute(
+                delete(HistoricalData).where(
+                    HistoricalData.symbol == symbol,
+                    HistoricalData.date >= replaced_from[symbol]
+                )
+            )
+            inserted[symbol] = inserted.get(symbol, 0) + self.bulk_insert(rows)
+        self.db.commit()
+
+        for symbol, start in replaced_from.items():
+            series_store.update(symbol, "1d", self.load(symbol, start), reload=lambda symbol=symbol: self.load(symbol))
+        return inserted
@@ -0,0 +1,309 @@
+"""Technical indicator overlays (SMA, EMA, RSI, Bollinger) kept up to date per appended bar"""
+import re
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.services.chart_series import ChartSeries
+
+
+INDICATOR_PATTERN = re.compile(r"^(sma|ema|rsi|bb)(\d{1,3})$")
+# Periods offered per indicator; anything else is rejected so clients cannot
+# create an unbounded number of tracks
+ALLOWED_PERIODS = {
+    "sma": (5, 10, 20, 50, 100, 200),
+    "ema": (9, 12, 20, 26, 50, 100, 200),
+    "rsi": (7, 14, 21),
+    "bb": (10, 20, 50),
+}
+BOLLINGER_WIDTH = 2.0
+# More new bars than this are cheaper to recompute vectorized than to step through
+MAX_INCREMENTAL_BARS = 512
+
+
+def parse_indicators(spec: Optional[str]) -> List[str]:
+    """'sma20,rsi14' -> ['sma20', 'rsi14']; raises ValueError for unknown names or periods"""
+    if not spec:
+        return []
+    names = []
+    for name in (part.strip().lower() for part in spec.split(",")):
+        match = INDICATOR_PATTERN.match(name)
+        if not match or int(match.group(2)) not in ALLOWED_PERIODS[match.group(1)]:
+            allowed = ", ".join(f"{kind}{'/'.join(map(str, periods))}" for kind, periods in ALLOWED_PERIODS.items())
+            raise ValueError(f"Unknown indicator: {name} (allowed: {allowed})")
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def _sma(close: np.ndarray, period: int) -> np.ndarray:
+    return pd.Series(close).rolling(period).mean().to_numpy()
+
+
+def _seeded_average(values: np.ndarray, period: int, alpha: float) -> np.ndarray:
+    """Recursive average seeded with the mean of the first ``period`` values; NaN before that"""
+    out = np.full(len(values), np.nan)
+    if len(values) < period:
+        return out
+    seeded = values[period - 1:].copy()
+    seeded[0] = values[:period].mean()
+    out[period - 1:] = pd.Series(seeded).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    return out
+
+
+class Indicator(ABC):
+    """
+    One indicator with a fixed period.
+
+    ``compute`` evaluates the whole history with array operations and returns
+    the running state after its last bar; ``step`` advances a state by one bar
+    in constant time. States are small and copied with ``copy_state`` so the
+    newest (possibly partial) bar can be replayed.
+    """
+
+    def __init__(self, name: str, period: int):
+        self.name = name
+        self.period = period
+
+    @property
+    def outputs(self) -> Tuple[str, ...]:
+        return (self.name,)
+
+    @abstractmethod
+    def compute(self, close: np.ndarray) -> Tuple[Dict[str, np.ndarray], dict]:
+        """Outputs for every bar of ``close`` and the running state after the last one"""
+
+    @abstractmethod
+    def step(self, state: dict, close: float) -> Dict[str, float]:
+        """Advance ``state`` by one bar in place and return that bar's outputs"""
+
+    def copy_state(self, state: dict) -> dict:
+        return dict(state)
+
+
+class SMA(Indicator):
+    def compute(self, close):
+        window = deque(close[-self.period:].tolist(), maxlen=self.period)
+        return {self.name: _sma(close, self.period)}, {"window": window, "sum": float(sum(window))}
+
+    def step(self, state, close):
+        window = state["window"]
+        if len(window) == self.period:
+            state["sum"] -= window[0]
+        window.append(close)
+        state["sum"] += close
+        return {self.name: state["sum"] / self.period if len(window) == self.period else np.nan}
+
+    def copy_state(self, state):
+        return {"window": deque(state["window"], maxlen=self.period), "sum": state["sum"]}
+
+
+class EMA(Indicator):
+    def compute(self, close):
+        values = _seeded_average(close, self.period, 2.0 / (self.period + 1))
+        seed = close[:self.period].tolist() if len(close) < self.period else []
+        return {self.name: values}, {"count": len(close), "seed": seed, "value": values[-1] if len(values) else np.nan}
+
+    def step(self, state, close):
+        state["count"] += 1
+        if state["count"] < self.period:
+            state["seed"].append(close)
+        elif state["count"] == self.period:
+            state["value"] = (sum(state["seed"]) + close) / self.period
+            state["seed"] = []
+        else:
+            alpha = 2.0 / (self.period + 1)
+            state["value"] += alpha * (close - state["value"])
+        return {self.name: state["value"] if state["count"] >= self.period else np.nan}
+
+    def copy_state(self, state):
+        return {**state, "seed": list(state["seed"])}
+
+
+class RSI(Indicator):
+    """Wilder's RSI over close-to-close changes"""
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+
+    def compute(self, close):
+        changes = np.diff(close)
+        gains = _seeded_average(np.maximum(changes, 0.0), self.period, 1.0 / self.period)
+        losses = _seeded_average(np.maximum(-changes, 0.0), self.period, 1.0 / self.period)
+        values = np.concatenate([[np.nan], self._rsi(gains, losses)]) if len(close) else np.empty(0)
+        state = {
+            "prev": float(close[-1]) if len(close) else None,
+            "count": len(changes),
+            "seed_gain": float(np.maximum(changes, 0.0).sum()) if len(changes) < self.period else 0.0,
+            "seed_loss": float(np.maximum(-changes, 0.0).sum()) if len(changes) < self.period else 0.0,
+            "gain": gains[-1] if len(gains) else np.nan,
+            "loss": losses[-1] if len(losses) else np.nan,
+        }
+        return {self.name: values}, state
+
+    def step(self, state, close):
+        prev, state["prev"] = state["prev"], close
+        if prev is None:
+            return {self.name: np.nan}
+        gain, loss = max(close - prev, 0.0), max(prev - close, 0.0)
+        state["count"] += 1
+        if state["count"] < self.period:
+            state["seed_gain"] += gain
+            state["seed_loss"] += loss
+            return {self.name: np.nan}
+        if state["count"] == self.period:
+            state["gain"] = (state["seed_gain"] + gain) / self.period
+            state["loss"] = (state["seed_loss"] + loss) / self.period
+        else:
+            state["gain"] += (gain - state["gain"]) / self.period
+            state["loss"] += (loss - state["loss"]) / self.period
+        return {self.name: float(self._rsi(state["gain"], state["loss"]))}
+
+
+class Bollinger(Indicator):
+    """Middle band = SMA, upper/lower = middle +/- BOLLINGER_WIDTH population standard deviations"""
+
+    @property
+    def outputs(self):
+        return (f"{self.name}_upper", f"{self.name}_middle", f"{self.name}_lower")
+
+    def _bands(self, middle, std):
+        return dict(zip(self.outputs, (middle + BOLLINGER_WIDTH * std, middle, middle - BOLLINGER_WIDTH * std)))
+
+    def compute(self, close):
+        rolling = pd.Series(close).rolling(self.period)
+        window = deque(close[-self.period:].tolist(), maxlen=self.period)
+        state = {"window": window, "sum": float(sum(window)), "sumsq": float(sum(x * x for x in window))}
+        return self._bands(rolling.mean().to_numpy(), rolling.std(ddof=0).to_numpy()), state
+
+    def step(self, state, close):
+        window = state["window"]
+        if len(window) == self.period:
+            state["sum"] -= window[0]
+            state["sumsq"] -= window[0] * window[0]
+        window.append(close)
+        state["sum"] += close
+        state["sumsq"] += close * close
+        if len(window) < self.period:
+            return dict.fromkeys(self.outputs, np.nan)
+        middle = state["sum"] / self.period
+        std = np.sqrt(max(state["sumsq"] / self.period - middle * middle, 0.0))
+        return self._bands(middle, std)
+
+    def copy_state(self, state):
+        return {**state, "window": deque(state["window"], maxlen=self.period)}
+
+
+INDICATOR_TYPES = {"sma": SMA, "ema": EMA, "rsi": RSI, "bb": Bollinger}
+
+
+def build_indicator(name: str) -> Indicator:
+    kind, period = INDICATOR_PATTERN.match(name).groups()
+    return INDICATOR_TYPES[kind](name, int(period))
+
+
+class _Track:
+    """
+    Output history and running state of one indicator over one (symbol,
+    interval) series. Outputs live in preallocated float64 buffers that grow
+    by doubling, so appending a bar is a single store and reads are views.
+    """
+
+    def __init__(self, indicator: Indicator, timestamps: np.ndarray, close: np.ndarray):
+        self.indicator = indicator
+        values, self.before_last = indicator.compute(close[:-1])
+        self.first_ts = int(timestamps[0])
+        self.last_ts = int(timestamps[-1])
+        self.length = len(close) - 1
+        capacity = max(16, 2 * len(close))
+        self.buffers = {}
+        for name in indicator.outputs:
+            buffer = np.empty(capacity, dtype=np.float64)
+            buffer[:self.length] = values[name]
+            self.buffers[name] = buffer
+        self.state = None
+        self._append(float(close[-1]))
+
+    def _append(self, close: float):
+        """Compute the bar after ``before_last`` and store it at position ``length``"""
+        if self.length >= len(next(iter(self.buffers.values()))):
+            for name, buffer in self.buffers.items():
+                grown = np.empty(2 * len(buffer), dtype=np.float64)
+                grown[:self.length] = buffer[:self.length]
+                self.buffers[name] = grown
+        self.state = self.indicator.copy_state(self.before_last)
+        for name, value in self.indicator.step(self.state, close).items():
+            self.buffers[name][self.length] = value
+        self.length += 1
+
+    def advance(self, timestamps: np.ndarray, close: np.ndarray) -> bool:
+        """Catch up with a longer series; False when it diverged and must be rebuilt"""
+        n = len(timestamps)
+        if n < self.length or int(timestamps[0]) != self.first_ts or int(timestamps[self.length - 1]) != self.last_ts:
+            return False
+        if n - self.length > MAX_INCREMENTAL_BARS:
+            return False
+        # The newest bar may have been rewritten since it was last seen: replay it
+        self.length -= 1
+        self._append(float(close[self.length]))
+        for position in range(self.length, n):
+            self.before_last = self.state
+            self._append(float(close[position]))
+        self.last_ts = int(timestamps[-1])
+        return True
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Read-only views of the outputs; only the newest value is ever rewritten"""
+        views = {}
+        for name, buffer in self.buffers.items():
+            view = buffer[:self.length]
+            view.flags.writeable = False
+            views[name] = view
+        return views
+
+
+class IndicatorEngine:
+    """
+    Keeps one _Track per (symbol, interval, indicator), at most ``max_tracks``
+    of them (least recently used are dropped). A request only steps through
+    the bars appended since the previous one (O(1) each); a track is
+    recomputed vectorized from the full history the first time an indicator
+    is requested (including with new parameters, which is a new name such as
+    sma50) or when the history changed anywhere but at its tail.
+    """
+
+    def __init__(self, max_tracks: Optional[int] = None):
+        self.max_tracks = settings.INDICATOR_MAX_TRACKS if max_tracks is None else max_tracks
+        self._lock = threading.Lock()
+        self._tracks: "OrderedDict[Tuple[str, str, str], _Track]" = OrderedDict()
+
+    def compute(self, symbol: str, interval: str, names: Sequence[str], series: ChartSeries) -> Dict[str, np.ndarray]:
+        """Indicator outputs aligned with ``series`` (NaN during each warm-up)"""
+        if not len(series):
+            return {output: np.empty(0) for name in names for output in build_indicator(name).outputs}
+
+        timestamps = np.asarray(series.timestamps)
+        close = np.asarray(series.close, dtype=np.float64)
+        results = {}
+        with self._lock:
+            for name in names:
+                key = (symbol, interval, name)
+                track = self._tracks.get(key)
+                if track is None or not track.advance(timestamps, close):
+                    track = _Track(build_indicator(name), timestamps, close)
+                    self._tracks[key] = track
+                self._tracks.move_to_end(key)
+                results.update(track.arrays())
+            while len(self._tracks) > self.max_tracks:
+                self._tracks.popitem(last=False)
+        return results
+
+
+indicator_engine = IndicatorEngine()
@@ -0,0 +1,168 @@
+"""Content-addressed response cache for async chat completion calls"""
+import asyncio
+import hashlib
+import json
+import threading
+import weakref
+from typing import Any, Callable, Dict, List, Optional
+
+import openai
+
+from app.core.cache import PersistentTTLCache
+from app.core.config import settings
+from app.core.rate_limit import AsyncRateLimiter, backoff_delay, parse_retry_after
+
+
+class CachedChatClient:
+    """
+    Wraps an AsyncOpenAI / AsyncAzureOpenAI client and caches chat completions.
+
+    The cache key is a SHA-256 over the deployment name, the messages, the
+    response_format and any other generation parameters, so an identical
+    request is answered from the cache at zero token cost. Hit/miss counts and
+    the tokens saved are tracked in ``stats``.
+
+    Cache misses go through an optional shared AsyncRateLimiter and are
+    retried on 429/5xx/connection errors up to ``max_retries`` times, honouring
+    Retry-After and otherwise backing off exponentially with jitter.
+
+    ``client_factory`` is called once per event loop, because async HTTP
+    clients cannot be shared between loops.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[], Any],
+        cache: PersistentTTLCache,
+        ttl: Optional[float] = None,
+        enabled: bool = True,
+        limiter: Optional[AsyncRateLimiter] = None,
+        max_retries: Optional[int] = None,
+        expected_completion_tokens: int = 2000
+    ):
+        self.client_factory = client_factory
+        self.cache = cache
+        self.ttl = ttl
+        self.enabled = enabled
+        self.limiter = limiter
+        self.max_retries = settings.MAX_RETRIES if max_retries is None else max_retries
+        self.expected_completion_tokens = expected_completion_tokens
+        self._clients = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "retries": 0, "tokens_saved": 0, "tokens_used": 0}
+
+    @property
+    def client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = self._clients[loop] = self.client_factory()
+        return client
+
+    @staticmethod
+    def cache_key(model: str, messages: List[Dict[str, Any]], response_format: Optional[dict] = None, **params) -> str:
+        payload = json.dumps(
+            {"model": model, "messages": messages, "response_format": response_format, "params": params},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, field: str, amount: int = 1):
+        with self._lock:
+            self.stats[field] += amount
+
+    def _estimate_tokens(self, messages: List[Dict[str, Any]], params: Dict[str, Any]) -> int:
+        # ~4 characters per token is close enough for quota accounting
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        completion_tokens = params.get("max_completion_tokens") or params.get("max_tokens") or self.expected_completion_tokens
+        return prompt_tokens + completion_tokens
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds to wait before retrying ``error``, or None if it is not retryable"""
+        if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+            return 0.0
+        if isinstance(error, openai.APIStatusError) and (error.status_code == 429 or error.status_code >= 500):
+            return parse_retry_after(getattr(error.response, "headers", None)) or 0.0
+        return None
+
+    async def _create(self, request: Dict[str, Any], estimated_tokens: int):
+        for attempt in range(self.max_retries + 1):
+            if self.limiter is not None:
+                await self.limiter.acquire(estimated_tokens)
+            try:
+                return await self.client.chat.completions.create(**request)
+            except Exception as e:
+                retry_after = self._retry_after(e)
+                if retry_after is None or attempt >= self.max_retries:
+                    raise
+
+                delay = retry_after + backoff_delay(attempt)
+                if isinstance(e, openai.RateLimitError) and self.limiter is not None:
+                    # Quota exhausted for everyone sharing the deployment, not just this caller
+                    self.limiter.pause(delay)
+                self._count("retries")
+                print(f"⚠️  LLM request failed ({e.__class__.__name__}), retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def complete(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        response_format: Optional[dict] = None,
+        use_cache: bool = True,
+        **params
+    ) -> str:
+        """Return the message content of a chat completion, from cache when possible"""
+        use_cache = use_cache and self.enabled
+        key = self.cache_key(model, messages, response_format, **params)
+
+        if use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                self._count("hits")
+                self._count("tokens_saved", cached.get("total_tokens", 0))
+                return cached["content"]
+
+        request = {"model": model, "messages": messages, **params}
+        if response_format is not None:
+            request["response_format"] = response_format
+
+        estimated_tokens = self._estimate_tokens(messages, params)
+        response = await self._create(request, estimated_tokens)
+
+        content = response.choices[0].message.content
+        usage = getattr(response, "usage", None)
+        total_tokens = getattr(usage, "total_tokens", 0) or 0
+        if self.limiter is not None and total_tokens:
+            self.limiter.settle(estimated_tokens, total_tokens)
+
+        self._count("misses")
+        self._count("tokens_used", total_tokens)
+        if content is not None:
+            await asyncio.to_thread(
+                self.cache.set, key, {"content": content, "total_tokens": total_tokens}, self.ttl
+            )
+
+        return content
+
+    def invalidate(self, model: str, messages: List[Dict[str, Any]], response_format: Optional[dict] = None, **params):
+        """Drop a cached response, e.g. one that turned out to be unparseable"""
+        self.cache.delete(self.cache_key(model, messages, response_format, **params))
+
+    @property
+    def hit_rate(self) -> float:
+        with self._lock:
+            total = self.stats["hits"] + self.stats["misses"]
+            return self.stats["hits"] / total if total else 0.0
+
+    def format_stats(self) -> str:
+        with self._lock:
+            stats = dict(self.stats)
+        return (
+            f"hits={stats['hits']} misses={stats['misses']} retries={stats['retries']} "
+            f"hit_rate={self.hit_rate:.0%} tokens_used={stats['tokens_used']} "
+            f"tokens_saved={stats['tokens_saved']}"
+        )
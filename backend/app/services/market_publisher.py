@@ -0,0 +1,79 @@
+"""Publish generated market data as per-section shard files plus a small manifest"""
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from app.core.json_output import file_lock, write_json
+
+
+MANIFEST_FILENAME = "manifest.json"
+MANIFEST_VERSION = 1
+SECTIONS = ("news", "forecasts", "popup", "report")
+MARKET_FIELDS = ("marketName", "marketNameTh", "symbol", "unit")
+
+
+def section_path(market_key: str, section: str) -> str:
+    """Shard path relative to the output directory (also used as its URL path)"""
+    return f"markets/{market_key}/{section}.json"
+
+
+def load_manifest(output_dir: str) -> Dict[str, Any]:
+    path = os.path.join(output_dir, MANIFEST_FILENAME)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("version") == MANIFEST_VERSION:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "generatedAt": None, "markets": {}}
+
+
+def publish_sections(
+    output_dir: str,
+    market_key: str,
+    sections: Dict[str, Any],
+    market_info: Optional[Dict[str, Any]] = None,
+    generated_at: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Write the given sections of one market and record them in the manifest.
+
+    Only the sections passed in are rewritten; every other market and section
+    entry in the manifest is kept, so a single section can be refreshed on its
+    own. Each entry records the shard path, SHA-256 of its bytes, size and
+    generation time. Returns the market's manifest entry.
+    """
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+
+    generated_at = generated_at or datetime.now().isoformat()
+    entries = {}
+    for section, data in sections.items():
+        relative_path = section_path(market_key, section)
+        payload = write_json(os.path.join(output_dir, relative_path), data)
+        entries[section] = {
+            "path": relative_path,
+            "sha256": hashlib.sha256(payload).hexdigest(),
+            "size": len(payload),
+            "generatedAt": generated_at
+        }
+
+    # Markets are published concurrently by threads, Celery workers and the
+    # scheduler; read-modify-write the manifest under an inter-process lock
+    with file_lock(os.path.join(output_dir, MANIFEST_FILENAME + ".lock")):
+        manifest = load_manifest(output_dir)
+        market_entry = manifest["markets"].setdefault(market_key, {"sections": {}})
+        for field in MARKET_FIELDS:
+            if market_info and field in market_info:
+                market_entry[field] = market_info[field]
+        market_entry["generatedAt"] = generated_at
+        market_entry["sections"].update(entries)
+
+        manifest["generatedAt"] = datetime.now().isoformat()
+        write_json(os.path.join(output_dir, MANIFEST_FILENAME), manifest)
+
+    return market_entry
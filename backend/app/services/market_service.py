@@ -1,31 +1,287 @@
 """Market data service"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.models.market import HistoricalData, MarketData
+from app.schemas.market import AssetStatisticsResponse, HistoricalDataResponse
+from app.services.asset_stats import statistics_engine
+from app.services.chart_series import ChartSeries, json_floats
+from app.services.downsampling import downsample_with_positions
+from app.services.indicators import indicator_engine
+from app.services.ohlc_rollup import INTRADAY_INTERVALS, OHLCRollup
+from app.services.refresh_jobs import load_script
+from app.services.series_store import series_store
+
+
+# Chart range -> lookback from the newest stored bar
+RANGE_LOOKBACK = {
+    "1D": timedelta(days=1),
+    "1M": timedelta(days=30),
+    "6M": timedelta(days=182),
+    "1Y": timedelta(days=365),
+    "5Y": timedelta(days=5 * 365),
+}
+
+# Resolution used when the caller does not ask for one
+DEFAULT_INTERVAL = {"1D": "5m"}
+
+# Columns refreshed on every quote cycle; name/metadata are kept up to date too
+UPSERT_COLUMNS = (
+    "name", "price", "change", "change_percent",
+    "open_price", "high_price", "low_price", "prev_close", "volume",
+    "currency", "asset_type", "is_active", "last_trade_time",
+)
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
+
+
+def rows_from_fetcher(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Map market_data_fetcher output to market_data rows keyed by the yfinance symbol"""
+    rows = []
+    for market in data.get("markets", []):
+        rows.append({
+            "symbol": market["yfinance_symbol"],
+            "name": market["name"],
+            "price": market["price"],
+            "change": market.get("change", 0.0),
+            "change_percent": market.get("changePercent", 0.0),
+            "open_price": market.get("open"),
+            "high_price": market.get("high"),
+            "low_price": market.get("low"),
+            "prev_close": market.get("prevClose"),
+            "volume": market.get("volume", 0.0),
+            "currency": market.get("currency", "USD")[:3],
+            "asset_type": "currency" if market.get("category") == "Currency" else "commodity",
+            "is_active": True,
+            "last_trade_time": _parse_timestamp(market.get("lastTradeTime")),
+        })
+    return rows
 
 
 class MarketService:
     """Service for managing market data"""
 
-    def __init__(self, db):
+    def __init__(self, db: Session):
         self.db = db
 
+    def upsert_market_data(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Insert or update many market_data rows in one statement.
+
+        Uses INSERT ... ON CONFLICT (symbol) DO UPDATE, so a refresh cycle is
+        a single round trip regardless of how many symbols it covers.
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        now = datetime.now(timezone.utc)
+        stmt = dialect_insert(MarketData.__table__, self.db.get_bind())
+        stmt = stmt.values([{**row, "updated_at": now} for row in rows])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[MarketData.symbol],
+            # onupdate=func.now() does not fire for ON CONFLICT updates
+            set_={
+                **{column: stmt.excluded[column] for column in UPSERT_COLUMNS if column in rows[0]},
+                "updated_at": stmt.excluded.updated_at,
+            }
+        )
+        self.db.execute(stmt)
+        self.db.commit()
+        return len(rows)
+
+    def _select_markets(self, active_only: bool = True):
+        # (symbol, is_active) matches idx_symbol_active and returns rows already ordered
+        query = select(MarketData)
+        if active_only:
+            query = query.where(MarketData.is_active.is_(True))
+        return query.order_by(MarketData.symbol, MarketData.is_active)
+
     async def get_market_overview(self):
         """Get market overview"""
+        markets = self.db.scalars(self._select_markets()).all()
+        updated = [m.updated_at or m.created_at for m in markets if (m.updated_at or m.created_at)]
         return {
-            "markets": [],
-            "lastUpdated": "2025-09-30T00:00:00Z"
+            "markets": markets,
+            "last_updated": max(updated) if updated else datetime.now(timezone.utc),
+            "total_assets": len(markets),
+            "gainers": sum(1 for m in markets if (m.change or 0) > 0),
+            "losers": sum(1 for m in markets if (m.change or 0) < 0),
         }
 
     async def get_all_markets(self, active_only: bool = True):
         """Get all markets"""
-        return []
+        return self.db.scalars(self._select_markets(active_only)).all()
 
     async def get_market_data(self, symbol: str):
         """Get market data for a symbol"""
-        return None
+        return self.db.scalars(select(MarketData).where(MarketData.symbol == symbol)).first()
 
     async def check_and_update_stale_data(self):
         """Check and update stale data"""
-        pass
+        last_updated = self.db.scalar(select(func.max(MarketData.updated_at)))
+        if last_updated is not None:
+            if last_updated.tzinfo is None:
+                last_updated = last_updated.replace(tzinfo=timezone.utc)
+            age = (datetime.now(timezone.utc) - last_updated).total_seconds()
+            if age < settings.MARKET_DATA_UPDATE_INTERVAL:
+                return
+        await self.refresh_all_market_data()
 
     async def refresh_all_market_data(self):
         """Refresh all market data"""
-        pass
\ No newline at end of file
+        fetcher = load_script("market_data_fetcher")
+        data = await asyncio.to_thread(fetcher.fetch_all_markets)
+        return self.upsert_market_data(rows_from_fetcher(data))
+
+    @staticmethod
+    def default_interval(time_range: str) -> str:
+        return DEFAULT_INTERVAL.get(time_range, "1d")
+
+    def load_chart_series(self, symbol: str, time_range: str = "1M", interval: Optional[str] = None) -> ChartSeries:
+        """
+        Bars for a chart range as column arrays, anchored at the newest stored bar.
+
+        Served from the memory-mapped series store when it holds the symbol;
+        otherwise intraday intervals are read from the ohlc_bars rollups and
+        daily bars from historical_data. Either way it is one range read at
+        the requested resolution.
+        """
+        interval = interval or self.default_interval(time_range)
+        lookback = RANGE_LOOKBACK.get(time_range, RANGE_LOOKBACK["1M"])
+        stored = series_store.window(symbol, interval, lookback)
+        if len(stored):
+            return stored
+
+        if interval in INTRADAY_INTERVALS:
+            rollup = OHLCRollup(self.db)
+            newest = rollup.newest(symbol, interval)
+            if newest is None:
+                return ChartSeries.empty()
+            return rollup.read(symbol, interval, start=newest - lookback)
+
+        newest = self.db.scalar(select(func.max(HistoricalData.date)).where(HistoricalData.symbol == symbol))
+        if newest is None:
+            return ChartSeries.empty()
+
+        rows = self.db.execute(
+            select(
+                HistoricalData.date, HistoricalData.open, HistoricalData.high,
+                HistoricalData.low, HistoricalData.close, HistoricalData.volume
+            )
+            .where(
+                HistoricalData.symbol == symbol,
+                HistoricalData.date >= newest - lookback
+            )
+            .order_by(HistoricalData.date)
+        )
+        return ChartSeries.from_rows(rows)
+
+    def _indicator_source(self, symbol: str, interval: str, series: ChartSeries) -> ChartSeries:
+        # Full stored history, so indicators are warmed up at the start of the range
+        stored = series_store.load(symbol, interval)
+        if len(stored) and len(series) and stored.timestamps[0] <= series.timestamps[0]:
+            return stored
+        return series
+
+    async def get_chart_series(
+        self,
+        symbol: str,
+        time_range: str = "1M",
+        interval: Optional[str] = None,
+        max_points: Optional[int] = None,
+        downsample_method: str = "lttb",
+        indicators: Sequence[str] = ()
+    ) -> Tuple[ChartSeries, Dict[str, np.ndarray]]:
+        """
+        Chart bars as column arrays at the requested resolution, optionally
+        downsampled, plus the requested indicator outputs aligned with them.
+        """
+        interval = interval or self.default_interval(time_range)
+        loaded = self.load_chart_series(symbol, time_range, interval)
+        series, positions = downsample_with_positions(loaded, max_points, downsample_method)
+        if not indicators or not len(series):
+            return series, {}
+
+        source = self._indicator_source(symbol, interval, loaded)
+        values = indicator_engine.compute(symbol, interval, indicators, source)
+        # positions index the loaded range; shift them to where that range starts in the source
+        positions = positions + int(np.searchsorted(source.timestamps, loaded.timestamps[0]))
+        return series, {name: array[positions] for name, array in values.items()}
+
+    async def get_chart_data(
+        self,
+        symbol: str,
+        time_range: str = "1M",
+        interval: Optional[str] = None,
+        max_points: Optional[int] = None,
+        downsample_method: str = "lttb",
+        indicators: Sequence[str] = ()
+    ):
+        """Get chart data for a symbol at the requested resolution, optionally downsampled"""
+        series, overlays = await self.get_chart_series(
+            symbol, time_range, interval, max_points, downsample_method, indicators
+        )
+        points = series.to_points()
+        return HistoricalDataResponse(
+            symbol=symbol,
+            data=points,
+            time_range=time_range,
+            total_points=len(points),
+            indicators={name: json_floats(values) for name, values in overlays.items()} or None
+        )
+
+    def compute_statistics(self, symbol: str) -> Dict[str, Any]:
+        """Memoized statistics over the last year of daily bars"""
+        series = self.load_chart_series(symbol, "1Y", "1d")
+        stats = dict(statistics_engine.get(symbol, series))
+        if len(series):
+            stats["as_of"] = series.iso_timestamps()[-1]
+        return stats
+
+    def refresh_statistics(self, symbols: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+        """Recompute stats for many symbols and write week_52_high/low in one executemany"""
+        if symbols is None:
+            symbols = self.db.scalars(select(MarketData.symbol).where(MarketData.is_active.is_(True))).all()
+        results = {symbol: self.compute_statistics(symbol) for symbol in symbols}
+
+        rows = [
+            {"b_symbol": symbol, "week_52_high": stats["week_52_high"], "week_52_low": stats["week_52_low"]}
+            for symbol, stats in results.items() if stats["bars"]
+        ]
+        if rows:
+            self.db.execute(
+                update(MarketData.__table__)
+                .where(MarketData.__table__.c.symbol == bindparam("b_symbol"))
+                .values(week_52_high=bindparam("week_52_high"), week_52_low=bindparam("week_52_low")),
+                rows
+            )
+            self.db.commit()
+        return results
+
+    async def get_asset_statistics(self, symbol: str) -> Optional[AssetStatisticsResponse]:
+        """Returns, volatility, drawdown, 52-week range and ATR for a symbol"""
+        stats = self.compute_statistics(symbol)
+        if not stats["bars"]:
+            return None
+
+        market = await self.get_market_data(symbol)
+        if market is not None and (market.week_52_high, market.week_52_low) != (stats["week_52_high"], stats["week_52_low"]):
+            market.week_52_high = stats["week_52_high"]
+            market.week_52_low = stats["week_52_low"]
+            self.db.commit()
+        return AssetStatisticsResponse(symbol=symbol, **stats)
@@ -0,0 +1,179 @@
+"""Raw 1m bars and incrementally maintained 5m/15m/1h rollups in ohlc_bars"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models.market import OHLCBar
+from app.services.chart_series import ChartSeries
+from app.services.downsampling import resample_ohlc
+from app.services.price_feed import download_histories
+from app.services.series_store import series_store
+
+
+RAW_INTERVAL = "1m"
+ROLLUP_INTERVALS = {
+    "5m": timedelta(minutes=5),
+    "15m": timedelta(minutes=15),
+    "1h": timedelta(hours=1),
+}
+INTERVAL_STEPS = {RAW_INTERVAL: timedelta(minutes=1), **ROLLUP_INTERVALS}
+INTRADAY_INTERVALS = tuple(INTERVAL_STEPS)
+# yfinance only serves 1m bars for the last few days
+RAW_SEED_PERIOD = "7d"
+
+
+def _step_ns(step: timedelta) -> int:
+    return int(step.total_seconds()) * 1_000_000_000
+
+
+def _to_datetimes(timestamps: np.ndarray) -> List[datetime]:
+    return pd.to_datetime(timestamps, utc=True).to_pydatetime().tolist()
+
+
+def _series_from_frame(frame: pd.DataFrame) -> ChartSeries:
+    frame = frame.dropna(subset=["Open", "High", "Low", "Close"])
+    return ChartSeries(
+        timestamps=pd.to_datetime(frame.index, utc=True).as_unit("ns").asi8,
+        open=frame["Open"].to_numpy(dtype=np.float64),
+        high=frame["High"].to_numpy(dtype=np.float64),
+        low=frame["Low"].to_numpy(dtype=np.float64),
+        close=frame["Close"].to_numpy(dtype=np.float64),
+        volume=np.nan_to_num(frame["Volume"].to_numpy(dtype=np.float64)) if "Volume" in frame else np.zeros(len(frame)),
+    )
+
+
+class OHLCRollup:
+    """
+    Maintains ohlc_bars for the intraday chart intervals.
+
+    New 1m bars are upserted as-is. For each coarser interval only the
+    buckets the new bars fall into are recomputed from the stored 1m bars
+    (open=first, high=max, low=min, close=last, volume=sum) and upserted, so
+    the cost of a refresh depends on how much arrived, not on history length.
+    Chart reads are then a single range scan over
+    idx_symbol_interval_bucket at the requested interval.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def _upsert(self, symbol: str, interval: str, series: ChartSeries):
+        if not len(series):
+            return
+        rows = [
+            {
+                "symbol": symbol,
+                "interval": interval,
+                "bucket_start": bucket_start,
+                "open": o,
+                "high": h,
+                "low": l,
+                "close": c,
+                "volume": v,
+            }
+            for bucket_start, o, h, l, c, v in zip(
+                _to_datetimes(series.timestamps), series.open.tolist(), series.high.tolist(),
+                series.low.tolist(), series.close.tolist(), series.volume.tolist()
+            )
+        ]
+        stmt = dialect_insert(OHLCBar.__table__, self.db.get_bind())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OHLCBar.symbol, OHLCBar.interval, OHLCBar.bucket_start],
+            set_={column: stmt.excluded[column] for column in ("open", "high", "low", "close", "volume")}
+        )
+        self.db.execute(stmt, rows)
+
+    def read(
+        self,
+        symbol: str,
+        interval: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None
+    ) -> ChartSeries:
+        """Bars of one interval in [start, end), as a ChartSeries"""
+        query = select(
+            OHLCBar.bucket_start, OHLCBar.open, OHLCBar.high, OHLCBar.low, OHLCBar.close, OHLCBar.volume
+        ).where(OHLCBar.symbol == symbol, OHLCBar.interval == interval)
+        if start is not None:
+            query = query.where(OHLCBar.bucket_start >= start)
+        if end is not None:
+            query = query.where(OHLCBar.bucket_start < end)
+        return ChartSeries.from_rows(self.db.execute(query.order_by(OHLCBar.bucket_start)))
+
+    def newest(self, symbol: str, interval: str) -> Optional[datetime]:
+        newest = self.db.scalar(
+            select(func.max(OHLCBar.bucket_start)).where(OHLCBar.symbol == symbol, OHLCBar.interval == interval)
+        )
+        if newest is not None and newest.tzinfo is None:
+            newest = newest.replace(tzinfo=timezone.utc)
+        return newest
+
+    def add_raw_bars(self, symbol: str, bars: ChartSeries) -> Dict[str, int]:
+        """Store new/updated 1m bars and refresh every rollup bucket they touch"""
+        if not len(bars):
+            return {}
+        self._upsert(symbol, RAW_INTERVAL, bars)
+        updated = {RAW_INTERVAL: len(bars)}
+
+        for interval, step in ROLLUP_INTERVALS.items():
+            step_ns = _step_ns(step)
+            touched = np.unique(bars.timestamps - bars.timestamps % step_ns)
+            first, last = _to_datetimes(touched[[0, -1]])
+            # Re-read the full touched buckets so bars stored by earlier runs are included
+            raw = self.read(symbol, RAW_INTERVAL, first, last + step)
+            rollup = resample_ohlc(raw, step_ns)
+            keep = np.isin(rollup.timestamps, touched)
+            rollup = rollup.take(np.flatnonzero(keep))
+            self._upsert(symbol, interval, rollup)
+            updated[interval] = len(rollup)
+        return updated
+
+    def ingest(self, symbols: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """Download 1m bars since each symbol's newest stored bar (one batched request) and roll them up"""
+        symbols = list(dict.fromkeys(symbols))
+        newest = {symbol: self.newest(symbol, RAW_INTERVAL) for symbol in symbols}
+
+        frames = {}
+        seed = [s for s in symbols if newest[s] is None]
+        update = [s for s in symbols if newest[s] is not None]
+        if seed:
+            frames.update(download_histories(seed, period=RAW_SEED_PERIOD, interval=RAW_INTERVAL))
+        if update:
+            oldest_allowed = datetime.now(timezone.utc) - timedelta(days=7)
+            start = max(min(newest[s] for s in update), oldest_allowed)
+            frames.update(download_histories(update, interval=RAW_INTERVAL, start=start))
+
+        result = {}
+        first_touched = {}
+        for symbol in symbols:
+            frame = frames.get(symbol)
+            if frame is None or frame.empty:
+                continue
+            bars = _series_from_frame(frame)
+            if newest[symbol] is not None:
+                # Keep the newest stored bar (it may have been partial) and everything after it
+                cutoff = pd.Timestamp(newest[symbol]).as_unit("ns").value
+                bars = bars.take(np.flatnonzero(bars.timestamps >= cutoff))
+            if len(bars):
+                result[symbol] = self.add_raw_bars(symbol, bars)
+                first_touched[symbol] = int(bars.timestamps[0])
+        self.db.commit()
+
+        for symbol, first in first_touched.items():
+            self.publish(symbol, first)
+        return result
+
+    def publish(self, symbol: str, since_ns: int):
+        """Copy every interval's bars from the bucket containing ``since_ns`` on into the series store"""
+        for interval, step in INTERVAL_STEPS.items():
+            step_ns = _step_ns(step)
+            start = _to_datetimes(np.array([since_ns - since_ns % step_ns]))[0]
+            series_store.update(
+                symbol, interval, self.read(symbol, interval, start),
+                reload=lambda interval=interval: self.read(symbol, interval)
+            )
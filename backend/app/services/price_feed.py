@@ -0,0 +1,63 @@
+"""Batched yfinance price downloads shared by the price history store and the ingestion jobs"""
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+import yfinance as yf
+
+
+DEFAULT_PERIOD = "30d"
+DEFAULT_INTERVAL = "1d"
+OHLCV_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+
+def _split_download(data: pd.DataFrame, symbols) -> Dict[str, pd.DataFrame]:
+    """Split a multi-ticker yf.download frame into one OHLCV frame per symbol"""
+    frames = {}
+    for symbol in symbols:
+        if isinstance(data.columns, pd.MultiIndex):
+            if symbol not in data.columns.get_level_values(0):
+                continue
+            frame = data[symbol]
+        else:
+            frame = data
+        frame = frame[[c for c in OHLCV_COLUMNS if c in frame.columns]].dropna(how="all")
+        if not frame.empty:
+            frames[symbol] = frame
+    return frames
+
+
+def download_histories(
+    symbols: Iterable[str],
+    period: Optional[str] = DEFAULT_PERIOD,
+    interval: str = DEFAULT_INTERVAL,
+    start=None,
+    end=None
+) -> Dict[str, pd.DataFrame]:
+    """
+    Download OHLCV bars for every symbol in a single multi-ticker request.
+
+    Pass either ``period`` or ``start``/``end``. Symbols without data are left
+    out of the result.
+    """
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    kwargs = {"interval": interval}
+    if start is not None or end is not None:
+        kwargs.update(start=start, end=end)
+    else:
+        kwargs["period"] = period
+
+    data = yf.download(
+        tickers=symbols,
+        group_by="ticker",
+        auto_adjust=False,
+        progress=False,
+        threads=True,
+        **kwargs
+    )
+    if data is None or data.empty:
+        return {}
+    return _split_download(data, symbols)
+
@@ -0,0 +1,149 @@
+"""Local per-symbol OHLCV history that only downloads bars it does not have yet"""
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from app.core.config import settings
+from app.services.price_feed import OHLCV_COLUMNS, download_histories
+
+
+class PriceHistoryStore:
+    """
+    One CSV file of daily OHLCV bars per symbol.
+
+    ``refresh`` seeds unknown symbols with ``seed_period`` of history and
+    otherwise downloads only the bars since the last stored timestamp (the last
+    bar is re-fetched because it may still be in progress). Every symbol that
+    needs data is fetched in a single batched request. Files younger than
+    ``max_age`` seconds are not refreshed at all.
+
+    Parsed frames are cached together with the file's (mtime, size), so bars
+    written by another process sharing the directory are picked up on the
+    next ``load``.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        seed_period: str = "1y",
+        interval: str = "1d",
+        max_age: Optional[float] = None
+    ):
+        self.directory = directory or settings.PRICE_HISTORY_DIR
+        self.seed_period = seed_period
+        self.interval = interval
+        self.max_age = settings.MARKET_DATA_UPDATE_INTERVAL if max_age is None else max_age
+        self._lock = threading.Lock()
+        # symbol -> ((st_mtime_ns, st_size), frame)
+        self._frames: Dict[str, Tuple[tuple, pd.DataFrame]] = {}
+
+    def _path(self, symbol: str) -> str:
+        safe_symbol = "".join(c if c.isalnum() else "_" for c in symbol)
+        return os.path.join(self.directory, f"{safe_symbol}_{self.interval}.csv")
+
+    @staticmethod
+    def _normalize(frame: pd.DataFrame) -> pd.DataFrame:
+        frame = frame[[c for c in OHLCV_COLUMNS if c in frame.columns]].copy()
+        frame.index = pd.to_datetime(frame.index, utc=True)
+        frame.index.name = "Date"
+        frame = frame[~frame.index.duplicated(keep="last")].sort_index()
+        return frame.dropna(subset=["Close"])
+
+    def load(self, symbol: str) -> pd.DataFrame:
+        """Stored bars for ``symbol`` (empty frame if none), without touching the network"""
+        path = self._path(symbol)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self._frames.pop(symbol, None)
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+        key = (stat.st_mtime_ns, stat.st_size)
+        cached = self._frames.get(symbol)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        frame = self._normalize(pd.read_csv(path, index_col=0))
+        self._frames[symbol] = (key, frame)
+        return frame
+
+    def _save(self, symbol: str, frame: pd.DataFrame):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(symbol)
+        tmp_path = f"{path}.tmp"
+        frame.to_csv(tmp_path)
+        os.replace(tmp_path, path)
+        stat = os.stat(path)
+        self._frames[symbol] = ((stat.st_mtime_ns, stat.st_size), frame)
+
+    def _is_fresh(self, symbol: str, now: float) -> bool:
+        path = self._path(symbol)
+        return os.path.exists(path) and now - os.path.getmtime(path) < self.max_age
+
+    def refresh(self, symbols: Iterable[str], force: bool = False) -> Dict[str, pd.DataFrame]:
+        """Bring every symbol up to date and return the full stored history per symbol"""
+        symbols = list(dict.fromkeys(symbols))
+
+        with self._lock:
+            now = time.time()
+            stale = [s for s in symbols if force or not self._is_fresh(s, now)]
+            existing = {s: self.load(s) for s in stale}
+
+            seed = [s for s in stale if existing[s].empty]
+            update = [s for s in stale if not existing[s].empty]
+
+            downloaded: Dict[str, pd.DataFrame] = {}
+            if seed:
+                downloaded.update(download_histories(seed, period=self.seed_period, interval=self.interval))
+            if update:
+                start = min(existing[s].index[-1] for s in update).date()
+                downloaded.update(download_histories(update, interval=self.interval, start=start))
+
+            for symbol in stale:
+                new_bars = downloaded.get(symbol)
+                if new_bars is None or new_bars.empty:
+                    continue
+                merged = self._normalize(pd.concat([existing[symbol], self._normalize(new_bars)]))
+                self._save(symbol, merged)
+
+            return {s: self.load(s) for s in symbols if not self.load(s).empty}
+
+    def get(self, symbol: str, days: Optional[int] = None, refresh: bool = True) -> pd.DataFrame:
+        """History for one symbol, optionally limited to the last ``days`` calendar days"""
+        frame = self.refresh([symbol]).get(symbol) if refresh else self.load(symbol)
+        if frame is None or frame.empty or days is None:
+            return frame if frame is not None else pd.DataFrame(columns=OHLCV_COLUMNS)
+        return frame[frame.index >= datetime.now(timezone.utc) - timedelta(days=days)]
+
+
+def compute_price_stats(history: pd.DataFrame, window_days: int = 30) -> dict:
+    """Latest bar, 1-day change and window change/high/low derived from local bars"""
+    if history is None or history.empty:
+        raise ValueError("No price history available")
+
+    window = history[history.index >= history.index[-1] - timedelta(days=window_days)]
+    closes = history["Close"]
+
+    current_price = float(closes.iloc[-1])
+    prev_price = float(closes.iloc[-2]) if len(closes) > 1 else current_price
+    window_start_price = float(window["Close"].iloc[0])
+
+    price_change = current_price - prev_price
+    return {
+        "current_price": current_price,
+        "prev_close": prev_price,
+        "price_change": price_change,
+        "price_change_pct": (price_change / prev_price) * 100 if prev_price else 0.0,
+        "price_change_window_pct": (
+            ((current_price - window_start_price) / window_start_price) * 100 if window_start_price else 0.0
+        ),
+        "high_window": float(window["High"].max()),
+        "low_window": float(window["Low"].min()),
+        "latest": history.iloc[-1],
+    }
+
+
+price_history_store = PriceHistoryStore()
@@ -0,0 +1,94 @@
+"""Periodic refresh jobs driven by the update intervals in Settings"""
+import importlib
+
+from app.core.config import settings
+from app.core.database import SessionLocal, create_tables
+from app.core.scheduler import IntervalScheduler
+from app.services.history_ingestion import HistoryIngestor
+from app.services.ohlc_rollup import OHLCRollup
+
+
+def load_script(name: str):
+    # The fetcher and generator are scripts next to the app package that create
+    # their API clients at import time, so only import them once a job runs.
+    return importlib.import_module(name)
+
+
+def refresh_quotes():
+    """Cheap quote refresh: prices only, no LLM calls"""
+    fetcher = load_script("market_data_fetcher")
+    data = fetcher.fetch_all_markets()
+    if data["markets"]:
+        fetcher.save_to_file(data)
+        if not settings.USE_MOCK_DATA:
+            fetcher.save_to_database(data)
+
+
+async def refresh_news():
+    """Fetch and score new articles and republish each market's news section"""
+    generator = load_script("data_generator_multi_v2")
+    await generator.refresh_news_sections(list(generator.MARKETS))
+
+
+def queue_news_refresh():
+    """Hand the news refresh to the llm worker queue (see app.worker)"""
+    from app.worker import enqueue, refresh_news_task
+
+    enqueue(refresh_news_task)
+
+
+def queue_insights_refresh():
+    """Queue the full per-market pipeline (forecasts, persona popup and report) on the llm workers"""
+    from app.worker import enqueue, generate_market_task
+
+    generator = load_script("data_generator_multi_v2")
+    for market_key in generator.MARKETS:
+        enqueue(generate_market_task, market_key)
+
+
+def ingest_history():
+    """Append new daily bars to historical_data (backfilling symbols seen for the first time)"""
+    fetcher = load_script("market_data_fetcher")
+    symbols = [config["symbol"] for config in fetcher.MARKETS.values()]
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        inserted = HistoryIngestor(db).append(symbols)
+        # Imported here: market_service imports load_script from this module
+        from app.services.market_service import MarketService
+        MarketService(db).refresh_statistics(symbols)
+    finally:
+        db.close()
+    print(f"✅ historical_data: {inserted}")
+
+
+def ingest_intraday():
+    """Append new 1m bars to ohlc_bars and update the 5m/15m/1h buckets they fall into"""
+    fetcher = load_script("market_data_fetcher")
+    symbols = [config["symbol"] for config in fetcher.MARKETS.values()]
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        updated = OHLCRollup(db).ingest(symbols)
+    finally:
+        db.close()
+    print(f"✅ ohlc_bars: {updated}")
+
+
+def build_scheduler() -> IntervalScheduler:
+    """
+    Quotes and price history run in the scheduler's own threads. News and
+    insights only enqueue Celery tasks (deduplicated while one is pending), so
+    the LLM pipeline never runs on the API event loop; they need an llm worker
+    or CELERY_TASK_ALWAYS_EAGER.
+    """
+    scheduler = IntervalScheduler(stagger=settings.SCHEDULER_STAGGER_SECONDS)
+    scheduler.add_job("quotes", refresh_quotes, settings.MARKET_DATA_UPDATE_INTERVAL)
+    scheduler.add_job("news", queue_news_refresh, settings.NEWS_UPDATE_INTERVAL)
+    scheduler.add_job("insights", queue_insights_refresh, settings.AI_INSIGHTS_UPDATE_INTERVAL)
+    if not settings.USE_MOCK_DATA:
+        scheduler.add_job("history", ingest_history, settings.HISTORY_UPDATE_INTERVAL)
+        scheduler.add_job("intraday", ingest_intraday, settings.MARKET_DATA_UPDATE_INTERVAL)
+    return scheduler
@@ -0,0 +1,198 @@
+"""Memory-mapped, append-only OHLCV column files per (symbol, interval)"""
+import os
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import quote
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.chart_series import ChartSeries
+
+
+COLUMN_DTYPES = {
+    "timestamps": np.dtype("<i8"),
+    "open": np.dtype("<f8"),
+    "high": np.dtype("<f8"),
+    "low": np.dtype("<f8"),
+    "close": np.dtype("<f8"),
+    "volume": np.dtype("<f8"),
+}
+ITEM_SIZE = 8
+CURRENT_FILE = "CURRENT"
+
+
+class SeriesStore:
+    """
+    Fixed-width little-endian column files (int64 ns timestamps, float64
+    OHLCV) for every (symbol, interval), read through read-only memory maps.
+
+    A range query is a binary search on the timestamp column plus a slice, and
+    the returned ChartSeries arrays are views into the mapping: nothing is
+    copied, pages are shared by every worker through the OS page cache, and
+    process memory does not grow with history length.
+
+    Files live in a generation directory named by ``CURRENT``. Writers append,
+    or overwrite the newest bars in place (the last bar of a feed is often
+    partial); the timestamp column is written last and readers size the
+    arrays by the shortest column, so a bar is only visible once complete.
+    Anything that would shrink the files (a rebuild, or bars inserted before
+    the stored tail) writes a new generation and swaps ``CURRENT`` instead of
+    truncating files other processes may have mapped. One writer process is
+    assumed; readers may be many.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.SERIES_STORE_DIR
+        self._lock = threading.Lock()
+        self._maps: Dict[Tuple[str, str], Tuple[tuple, ChartSeries]] = {}
+
+    # ---------------------------------------------------------------------
+    # Layout
+    # ---------------------------------------------------------------------
+
+    def _root(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.directory, quote(symbol, safe=""), interval)
+
+    def _generation(self, root: str) -> Optional[str]:
+        try:
+            with open(os.path.join(root, CURRENT_FILE), "r", encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    @staticmethod
+    def _column_path(generation_dir: str, name: str) -> str:
+        return os.path.join(generation_dir, f"{name}.bin")
+
+    # ---------------------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------------------
+
+    def load(self, symbol: str, interval: str) -> ChartSeries:
+        """Every stored bar as memory-mapped views (empty if nothing is stored)"""
+        root = self._root(symbol, interval)
+        generation = self._generation(root)
+        if generation is None:
+            return ChartSeries.empty()
+
+        generation_dir = os.path.join(root, generation)
+        try:
+            sizes = [os.path.getsize(self._column_path(generation_dir, name)) for name in ChartSeries.FIELDS]
+        except FileNotFoundError:
+            # CURRENT was swapped between the two reads; the next call sees the new generation
+            return ChartSeries.empty()
+        length = min(sizes) // ITEM_SIZE
+
+        key = (generation, length)
+        cached = self._maps.get((symbol, interval))
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        if length == 0:
+            series = ChartSeries.empty()
+        else:
+            series = ChartSeries(*(
+                np.memmap(self._column_path(generation_dir, name), dtype=COLUMN_DTYPES[name], mode="r", shape=(length,))
+                for name in ChartSeries.FIELDS
+            ))
+        self._maps[(symbol, interval)] = (key, series)
+        return series
+
+    def range(self, symbol: str, interval: str, start_ns: Optional[int] = None, end_ns: Optional[int] = None) -> ChartSeries:
+        """Bars with start_ns <= timestamp < end_ns, as views"""
+        series = self.load(symbol, interval)
+        lo = 0 if start_ns is None else int(np.searchsorted(series.timestamps, start_ns, side="left"))
+        hi = len(series) if end_ns is None else int(np.searchsorted(series.timestamps, end_ns, side="left"))
+        return series.take(slice(lo, hi))
+
+    def window(self, symbol: str, interval: str, lookback: timedelta) -> ChartSeries:
+        """Bars within ``lookback`` of the newest stored one"""
+        series = self.load(symbol, interval)
+        if not len(series):
+            return series
+        newest = int(series.timestamps[-1])
+        return self.range(symbol, interval, start_ns=newest - int(lookback.total_seconds() * 1_000_000_000))
+
+    # ---------------------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------------------
+
+    def _write_generation(self, root: str, series: ChartSeries):
+        generation = uuid.uuid4().hex
+        generation_dir = os.path.join(root, generation)
+        os.makedirs(generation_dir)
+        for name in ChartSeries.FIELDS:
+            with open(self._column_path(generation_dir, name), "wb") as f:
+                f.write(getattr(series, name).astype(COLUMN_DTYPES[name]).tobytes())
+
+        previous = self._generation(root)
+        tmp_current = os.path.join(root, f".{CURRENT_FILE}.{generation}")
+        with open(tmp_current, "w", encoding="utf-8") as f:
+            f.write(generation)
+        os.replace(tmp_current, os.path.join(root, CURRENT_FILE))
+        if previous:
+            # Readers that still map the old files keep their pages until they re-open
+            shutil.rmtree(os.path.join(root, previous), ignore_errors=True)
+
+    def replace(self, symbol: str, interval: str, series: ChartSeries):
+        """Rewrite everything stored for (symbol, interval) with ``series``"""
+        root = self._root(symbol, interval)
+        with self._lock:
+            os.makedirs(root, exist_ok=True)
+            self._write_generation(root, series)
+
+    def write(self, symbol: str, interval: str, bars: ChartSeries) -> int:
+        """
+        Store ``bars`` (sorted, may overlap the stored tail). Stored bars at or
+        after ``bars``' first timestamp are overwritten; stored bars after its
+        last timestamp are kept.
+        """
+        if not len(bars):
+            return 0
+        root = self._root(symbol, interval)
+        with self._lock:
+            os.makedirs(root, exist_ok=True)
+            current = self.load(symbol, interval)
+            stored = len(current)
+            pos = int(np.searchsorted(current.timestamps, bars.timestamps[0], side="left"))
+            after = int(np.searchsorted(current.timestamps, bars.timestamps[-1], side="right"))
+            tail = bars
+            if after < stored:
+                kept = current.take(slice(after, stored))
+                tail = ChartSeries(*(np.concatenate([getattr(bars, name), getattr(kept, name)]) for name in ChartSeries.FIELDS))
+
+            if stored == 0 or pos + len(tail) < stored:
+                head = current.take(slice(0, pos))
+                merged = ChartSeries(*(np.concatenate([getattr(head, name), getattr(tail, name)]) for name in ChartSeries.FIELDS))
+                self._write_generation(root, merged)
+                return len(bars)
+
+            generation_dir = os.path.join(root, self._generation(root))
+            # Values before timestamps: a reader sizes the arrays by the shortest column
+            for name in (*ChartSeries.FIELDS[1:], "timestamps"):
+                with open(self._column_path(generation_dir, name), "r+b") as f:
+                    f.seek(pos * ITEM_SIZE)
+                    f.write(getattr(tail, name).astype(COLUMN_DTYPES[name]).tobytes())
+            return len(bars)
+
+    def update(self, symbol: str, interval: str, bars: ChartSeries, reload: Callable[[], ChartSeries]) -> int:
+        """
+        Write ``bars`` when the store already holds everything before them;
+        otherwise (nothing stored yet, or older history was added) rebuild
+        from ``reload()``, the authoritative full series.
+        """
+        if not len(bars):
+            return 0
+        current = self.load(symbol, interval)
+        if not len(current) or bars.timestamps[0] < current.timestamps[0]:
+            full = reload()
+            self.replace(symbol, interval, full)
+            return len(full)
+        return self.write(symbol, interval, bars)
+
+
+series_store = SeriesStore()
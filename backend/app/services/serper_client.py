@@ -0,0 +1,195 @@
+"""Google Serper search client with pooled keep-alive connections"""
+import http.client
+import json
+import os
+import queue
+from typing import Dict, List, Optional
+
+from app.core.config import settings
+
+
+class SerperError(Exception):
+    """Raised when google.serper.dev returns an error or an unreadable response"""
+
+
+class SerperClient:
+    """
+    Thread-safe client for the Serper search API.
+
+    Connections are HTTP/1.1 keep-alive and are returned to a small pool after
+    each request, so repeated searches skip the TCP and TLS handshake. One
+    instance can be shared by every concurrent market worker. An optional
+    PersistentTTLCache short-circuits queries whose results are still fresh.
+    """
+
+    HOST = "google.serper.dev"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_size: int = 8,
+        cache=None,
+        cache_ttls: Optional[Dict[str, float]] = None
+    ):
+        self.api_key = api_key or os.getenv("SERPER_API_KEY")
+        self.timeout = settings.EXTERNAL_API_TIMEOUT if timeout is None else timeout
+        self.cache = cache
+        self.cache_ttls = cache_ttls or {}
+        self._pool: "queue.LifoQueue[http.client.HTTPSConnection]" = queue.LifoQueue(maxsize=pool_size)
+
+    # ---------------------------------------------------------------------
+    # Connection pool
+    # ---------------------------------------------------------------------
+
+    def _acquire(self):
+        """Return (connection, reused)"""
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return http.client.HTTPSConnection(self.HOST, timeout=self.timeout), False
+
+    def _release(self, conn: http.client.HTTPSConnection):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self):
+        """Close every pooled connection"""
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def _post(self, path: str, body) -> object:
+        payload = json.dumps(body)
+        headers = {
+            'X-API-KEY': self.api_key or '',
+            'Content-Type': 'application/json',
+            'Connection': 'keep-alive'
+        }
+
+        while True:
+            conn, reused = self._acquire()
+            try:
+                conn.request("POST", path, payload, headers)
+                res = conn.getresponse()
+                data = res.read()
+            except (http.client.HTTPException, OSError):
+                conn.close()
+                # The server may have dropped an idle keep-alive connection;
+                # retry on a fresh one before giving up.
+                if reused:
+                    continue
+                raise
+
+            if res.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            break
+
+        if res.status != 200:
+            raise SerperError(f"Serper returned HTTP {res.status}: {data[:200]!r}")
+        try:
+            return json.loads(data.decode("utf-8"))
+        except ValueError as e:
+            raise SerperError(f"Invalid JSON from Serper: {e}")
+
+    # ---------------------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------------------
+
+    @staticmethod
+    def cache_key(query: str, num_results: int, gl: str, hl: str) -> str:
+        return json.dumps([query, num_results, gl, hl], ensure_ascii=False)
+
+    def _ttl(self, query_class: str) -> Optional[float]:
+        return self.cache_ttls.get(query_class, self.cache_ttls.get("default"))
+
+    def search(
+        self,
+        query: str,
+        num_results: int = 3,
+        gl: str = "us",
+        hl: str = "en",
+        query_class: str = "default",
+        force_refresh: bool = False
+    ) -> List[dict]:
+        """Return the organic results for one query. Raises SerperError on API errors."""
+        key = self.cache_key(query, num_results, gl, hl)
+        if self.cache is not None and not force_refresh:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        results = self._post("/search", {"q": query, "num": num_results, "gl": gl, "hl": hl})
+        organic = results.get('organic', []) if isinstance(results, dict) else []
+
+        if self.cache is not None:
+            self.cache.set(key, organic, ttl=self._ttl(query_class))
+
+        return organic
+
+    def search_many(
+        self,
+        queries: List[str],
+        num_results: int = 3,
+        gl: str = "us",
+        hl: str = "en",
+        query_class: str = "default",
+        force_refresh: bool = False
+    ) -> List[List[dict]]:
+        """
+        Return organic results for several queries, in the same order.
+
+        Cached queries are answered locally; the rest go to Serper as a single
+        batched request. If the batch fails, each query is retried on its own
+        and a query that still fails yields an empty list.
+        """
+        results: List[Optional[List[dict]]] = [None] * len(queries)
+        pending = []
+        for idx, query in enumerate(queries):
+            cached = None
+            if self.cache is not None and not force_refresh:
+                cached = self.cache.get(self.cache_key(query, num_results, gl, hl))
+            if cached is not None:
+                results[idx] = cached
+            else:
+                pending.append(idx)
+
+        if len(pending) == 1:
+            # A single miss goes through the plain endpoint below
+            pending_results = None
+        elif pending:
+            body = [{"q": queries[idx], "num": num_results, "gl": gl, "hl": hl} for idx in pending]
+            try:
+                pending_results = self._post("/search", body)
+                if not isinstance(pending_results, list) or len(pending_results) != len(pending):
+                    raise SerperError("Batch response does not match the submitted queries")
+            except (SerperError, http.client.HTTPException, OSError) as e:
+                print(f"⚠️  Serper batch search failed, falling back to single queries: {e}")
+                pending_results = None
+        else:
+            pending_results = []
+
+        if pending_results is None:
+            for idx in pending:
+                try:
+                    results[idx] = self.search(
+                        queries[idx], num_results, gl, hl, query_class, force_refresh=True
+                    )
+                except (SerperError, http.client.HTTPException, OSError) as e:
+                    print(f"⚠️  Serper search error for '{queries[idx]}': {e}")
+                    results[idx] = []
+        else:
+            ttl = self._ttl(query_class)
+            for idx, response in zip(pending, pending_results):
+                organic = response.get('organic', []) if isinstance(response, dict) else []
+                results[idx] = organic
+                if self.cache is not None:
+                    self.cache.set(self.cache_key(queries[idx], num_results, gl, hl), organic, ttl=ttl)
+
+        return results
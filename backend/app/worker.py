@@ -0,0 +1,246 @@
+"""
+Celery app and background tasks.
+
+Quote refreshes and the LLM-heavy generator pipeline go to separate queues so
+they can be served by separate worker pools, e.g.::
+
+    celery -A app.worker worker -Q quotes -c 4
+    celery -A app.worker worker -Q llm -c 1
+
+With CELERY_TASK_ALWAYS_EAGER=true tasks run inline in the calling process,
+which then also keeps their results and dedupe keys in memory, so no broker
+or Redis is needed (e.g. for tests).
+
+``enqueue`` makes blocking broker/Redis calls (and, in eager mode, runs the
+task inline), so call it from a thread, never directly on an event loop.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Coroutine, Dict, Optional, Tuple
+
+from celery import Celery, signals
+from celery.result import AsyncResult
+from celery.utils import uuid
+from kombu import Queue
+
+from app.core.config import settings
+from app.services.refresh_jobs import load_script, refresh_news, refresh_quotes
+
+
+QUOTES_QUEUE = "quotes"
+LLM_QUEUE = "llm"
+MAX_PRIORITY = 9
+
+# Eager tasks run in this process, so their results need not (and, without a
+# reachable Redis, could not) be stored anywhere else
+RESULT_BACKEND = "cache+memory://" if settings.CELERY_TASK_ALWAYS_EAGER else settings.CELERY_RESULT_BACKEND
+
+celery_app = Celery(
+    "marketpulse",
+    broker=settings.CELERY_BROKER_URL,
+    backend=RESULT_BACKEND
+)
+
+celery_app.conf.update(
+    task_queues=(
+        Queue(QUOTES_QUEUE, routing_key=QUOTES_QUEUE, queue_arguments={"x-max-priority": MAX_PRIORITY}),
+        Queue(LLM_QUEUE, routing_key=LLM_QUEUE, queue_arguments={"x-max-priority": MAX_PRIORITY}),
+    ),
+    task_default_queue=QUOTES_QUEUE,
+    task_default_priority=5,
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_track_started=True,
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    result_expires=24 * 3600,
+    # Redis emulates priorities with one list per priority step
+    broker_transport_options={
+        "priority_steps": list(range(MAX_PRIORITY + 1)),
+        "queue_order_strategy": "priority",
+    },
+    # Fail fast instead of hanging an API request when the broker is down
+    broker_connection_timeout=settings.EXTERNAL_API_TIMEOUT,
+    task_publish_retry_policy={"max_retries": 2, "interval_start": 0, "interval_step": 0.5},
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_store_eager_result=True,
+)
+
+
+# =====================================================
+# Dedupe keys
+# =====================================================
+
+class DedupeRegistry:
+    """
+    Maps a dedupe key to the id of the queued/running task that owns it.
+
+    Uses Redis (SET NX with a TTL) when the broker is Redis, so every API
+    process shares it; workers release the key when the task finishes. The
+    TTL only matters if a worker dies before releasing its key.
+
+    Otherwise (eager mode, or a non-Redis broker) keys live in a process-local
+    dict. A worker in another process cannot release those, so a key is also
+    treated as free once ``is_finished`` reports its task done in the result
+    backend.
+    """
+
+    _RELEASE_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(self, url: Optional[str], ttl: int, is_finished: Optional[Callable[[str], bool]] = None):
+        self.ttl = ttl
+        self.is_finished = is_finished
+        self._redis = None
+        if url and url.startswith(("redis://", "rediss://")):
+            import redis
+
+            self._redis = redis.Redis.from_url(
+                url,
+                socket_timeout=settings.EXTERNAL_API_TIMEOUT,
+                socket_connect_timeout=settings.EXTERNAL_API_TIMEOUT
+            )
+        self._lock = threading.Lock()
+        self._local: Dict[str, Tuple[str, float]] = {}
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"marketpulse:dedupe:{key}"
+
+    def claim(self, key: str, task_id: str) -> Optional[str]:
+        """Register ``task_id`` for ``key``; return the existing owner's id if already taken"""
+        if self._redis is not None:
+            if self._redis.set(self._redis_key(key), task_id, nx=True, ex=self.ttl):
+                return None
+            existing = self._redis.get(self._redis_key(key))
+            return existing.decode() if existing else self.claim(key, task_id)
+
+        with self._lock:
+            now = time.time()
+            existing = self._local.get(key)
+            if existing is not None and existing[1] > now and not self._finished(existing[0]):
+                return existing[0]
+            self._local[key] = (task_id, now + self.ttl)
+            return None
+
+    def _finished(self, task_id: str) -> bool:
+        if self.is_finished is None:
+            return False
+        try:
+            return self.is_finished(task_id)
+        except Exception:
+            # No usable result backend: fall back to the TTL
+            return False
+
+    def release(self, key: str, task_id: str):
+        if self._redis is not None:
+            self._redis.eval(self._RELEASE_SCRIPT, 1, self._redis_key(key), task_id)
+            return
+        with self._lock:
+            existing = self._local.get(key)
+            if existing is not None and existing[0] == task_id:
+                del self._local[key]
+
+
+def _task_finished(task_id: str) -> bool:
+    return AsyncResult(task_id, app=celery_app).ready()
+
+
+dedupe_registry = DedupeRegistry(
+    None if settings.CELERY_TASK_ALWAYS_EAGER else settings.CELERY_BROKER_URL,
+    settings.CELERY_DEDUPE_TTL,
+    is_finished=_task_finished
+)
+
+
+def dedupe_key(task_name: str, args: tuple = ()) -> str:
+    return ":".join([task_name, *map(str, args)])
+
+
+@signals.task_postrun.connect
+def _release_dedupe_key(sender=None, task_id=None, args=None, **kwargs):
+    if sender is not None and task_id:
+        dedupe_registry.release(dedupe_key(sender.name, tuple(args or ())), task_id)
+
+
+def enqueue(task, *args, priority: Optional[int] = None) -> Tuple[str, bool]:
+    """
+    Queue ``task`` unless an identical one (same name and args) is already
+    queued or running. Returns ``(task_id, created)``.
+    """
+    key = dedupe_key(task.name, args)
+    task_id = uuid()
+    existing = dedupe_registry.claim(key, task_id)
+    if existing is not None:
+        return existing, False
+
+    options = {"priority": priority} if priority is not None else {}
+    try:
+        task.apply_async(args=args, task_id=task_id, **options)
+    except Exception:
+        dedupe_registry.release(key, task_id)
+        raise
+    return task_id, True
+
+
+def get_task_status(task_id: str) -> dict:
+    result = AsyncResult(task_id, app=celery_app)
+    status = {"taskId": task_id, "status": result.state, "result": None, "error": None}
+    if result.successful():
+        status["result"] = result.result
+    elif result.failed():
+        status["error"] = str(result.result)
+    return status
+
+
+# =====================================================
+# Tasks
+# =====================================================
+
+def run_coroutine(coro: Coroutine) -> Any:
+    """
+    Run ``coro`` to completion from synchronous task code. Tasks normally run
+    on a worker thread without a loop; in eager mode they may be called from
+    a thread that already runs one, where asyncio.run() is not allowed, so the
+    coroutine then gets a fresh loop on its own thread.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coro).result()
+
+
+@celery_app.task(name="marketpulse.refresh_quotes", queue=QUOTES_QUEUE, priority=MAX_PRIORITY)
+def refresh_quotes_task():
+    """Cheap price refresh for every market card"""
+    refresh_quotes()
+    return {"refreshedAt": time.time()}
+
+
+@celery_app.task(name="marketpulse.generate_market", queue=LLM_QUEUE, priority=3)
+def generate_market_task(market_key: str):
+    """Full generator pipeline (news scoring, forecasts, popup, report) for one market"""
+    generator = load_script("data_generator_multi_v2")
+    if market_key not in generator.MARKETS:
+        raise ValueError(f"Unknown market: {market_key}")
+
+    combined = run_coroutine(generator.process_market_async(market_key))
+    if not combined:
+        raise RuntimeError(f"Generator pipeline failed for {market_key}")
+    # Merged into the legacy index; other markets' entries are kept
+    generator.write_all_markets_index({market_key: combined})
+    # The full document is published to disk; keep the result backend small
+    return {"market": market_key, "generatedAt": combined["generatedAt"]}
+
+
+@celery_app.task(name="marketpulse.refresh_news", queue=LLM_QUEUE, priority=5)
+def refresh_news_task():
+    """Fetch and score new articles and republish each market's news section"""
+    run_coroutine(refresh_news())
+    return {"refreshedAt": time.time()}
@@ -7,34 +7,102 @@ Market Pulse Data Generator - Multi-Asset Version V2 (Enhanced with Persona-base
 """
 
 import yfinance as yf
-import http.client
+import argparse
+import asyncio
 import json
 from datetime import datetime, timedelta
-from openai import AzureOpenAI
+from urllib.parse import urlsplit
+from openai import AsyncAzureOpenAI
 from pydantic import BaseModel
 from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
+from app.core.cache import PersistentTTLCache
+from app.core.config import settings
+from app.core.json_output import file_lock, write_json
+from app.core.rate_limit import AsyncRateLimiter
+from app.core.task_graph import StepGraph
+from app.services.llm_cache import CachedChatClient
+from app.services.market_publisher import SECTIONS, publish_sections
+from app.services.price_history_store import compute_price_stats, price_history_store
+from app.services.serper_client import SerperClient
+
 # =====================================================
 # Configuration
 # =====================================================
 
 load_dotenv()
 
-# Azure OpenAI Client
-client = AzureOpenAI(
-    api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-    api_version="2024-08-01-preview",
-    azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT")
-)
+# Azure OpenAI Client (async) - retry ทำเองใน llm_client เพื่อให้ใช้ rate limiter ร่วมกัน
+def create_llm_client():
+    return AsyncAzureOpenAI(
+        api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+        api_version="2024-08-01-preview",
+        azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+        max_retries=0
+    )
 
 DEPLOYMENT_NAME = "gpt-5-mini"  # Azure deployment name
 SERPER_API_KEY = os.getenv("SERPER_API_KEY")
 
+# จำนวนตลาดสูงสุดที่ประมวลผลพร้อมกัน (override ได้ด้วย --max-concurrency)
+MAX_CONCURRENT_MARKETS = int(os.getenv("MAX_CONCURRENT_MARKETS", "4"))
+
 # Use relative path from backend directory to frontend/public/data
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "frontend", "public", "data")
+CACHE_DIR = os.getenv("GENERATOR_CACHE_DIR", os.path.join(SCRIPT_DIR, "cache"))
+
+# Serper result cache - query ที่ซ้ำกันระหว่างรอบจะไม่ยิง API ใหม่จนกว่าจะหมดอายุ
+SERPER_CACHE_TTLS = {
+    "forecast": 24 * 3600,   # search_queries สำหรับพยากรณ์ราคา
+    "persona": 72 * 3600,    # persona_queries (บทความกลยุทธ์ เปลี่ยนช้า)
+    "default": 12 * 3600
+}
+SERPER_CACHE_MAX_ENTRIES = int(os.getenv("SERPER_CACHE_MAX_ENTRIES", "500"))
+# ตั้ง SERPER_FORCE_REFRESH=1 หรือใช้ --refresh-search เพื่อข้าม cache
+SERPER_FORCE_REFRESH = os.getenv("SERPER_FORCE_REFRESH", "").lower() in ("1", "true", "yes")
+
+serper_cache = PersistentTTLCache(
+    os.path.join(CACHE_DIR, "serper_cache.json"),
+    default_ttl=SERPER_CACHE_TTLS["default"],
+    max_entries=SERPER_CACHE_MAX_ENTRIES
+)
+
+# คะแนนข่าวที่ LLM ให้ไว้แล้ว (key = market:canonical URL) - ข่าวเดิมไม่ต้องส่งให้ LLM ซ้ำ
+NEWS_SCORE_TTL = 14 * 24 * 3600
+scored_news_cache = PersistentTTLCache(
+    os.path.join(CACHE_DIR, "scored_news.json"),
+    default_ttl=NEWS_SCORE_TTL,
+    max_entries=int(os.getenv("SCORED_NEWS_MAX_ENTRIES", "2000"))
+)
+
+# Shared by every market worker - keeps keep-alive connections to google.serper.dev
+serper_client = SerperClient(
+    api_key=SERPER_API_KEY,
+    cache=serper_cache,
+    cache_ttls=SERPER_CACHE_TTLS
+)
+
+# LLM response cache - prompt เดิม (deployment + messages + response_format) ได้คำตอบจาก cache ทันที
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(6 * 3600)))
+# ใช้ quota RPM/TPM ของ deployment ร่วมกันทุกตลาด
+llm_rate_limiter = AsyncRateLimiter(
+    requests_per_minute=settings.AZURE_OPENAI_REQUESTS_PER_MINUTE,
+    tokens_per_minute=settings.AZURE_OPENAI_TOKENS_PER_MINUTE
+)
+llm_client = CachedChatClient(
+    create_llm_client,
+    PersistentTTLCache(
+        os.path.join(CACHE_DIR, "llm_cache.json"),
+        default_ttl=LLM_CACHE_TTL,
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", "200"))
+    ),
+    enabled=os.getenv("LLM_CACHE_DISABLED", "").lower() not in ("1", "true", "yes"),
+    limiter=llm_rate_limiter,
+    max_retries=settings.MAX_RETRIES
+)
 
 # Market Configurations
 MARKETS = {
@@ -114,6 +182,8 @@ MARKETS = {
     }
 }
 
+PERSONAS = ["sme", "supply_chain", "investor"]
+
 # Get current date/time for prompts
 def get_current_datetime_context():
     """สร้าง context เวลาปัจจุบันสำหรับ LLM"""
@@ -124,7 +194,7 @@ def get_current_datetime_context():
         'context_text': f"""
 TODAY'S DATE & TIME CONTEXT:
 - Current Date: {now.strftime('%Y-%m-%d (%A)')}
-- Current Time: {now.strftime('%H:%M:%S')} (Thailand time)
+- Current Time: {now.strftime('%H:00')} (Thailand time)
 - Quarter: Q{(now.month-1)//3 + 1}/2025
 
 IMPORTANT: Use this date for ALL time-sensitive recommendations:
@@ -132,6 +202,27 @@ IMPORTANT: Use this date for ALL time-sensitive recommendations:
 """
     }
 
+async def request_llm_json(system_prompt: str, user_prompt: str, output_model):
+    """เรียก LLM ผ่าน llm_client (มี cache) แล้ว validate ผลลัพธ์ด้วย output_model
+
+    ถ้าผลลัพธ์ parse/validate ไม่ผ่าน จะลบออกจาก cache ก่อน raise เพื่อให้รอบหน้าเรียกใหม่
+    """
+    request = {
+        "model": DEPLOYMENT_NAME,
+        "messages": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ],
+        "response_format": {"type": "json_object"},
+    }
+    content = await llm_client.complete(**request)
+
+    try:
+        return output_model(**json.loads(content))
+    except (TypeError, ValueError):
+        llm_client.invalidate(**request)
+        raise
+
 # =====================================================
 # Pydantic Models for Structured Output
 # =====================================================
@@ -221,46 +312,46 @@ class SimplifiedPopupData(BaseModel):
 # Google Serper Helper Functions
 # =====================================================
 
-def search_with_serper(query: str, num_results: int = 3) -> List[dict]:
-    """ค้นหาข้อมูลผ่าน Google Serper API"""
-    try:
-        conn = http.client.HTTPSConnection("google.serper.dev")
-        payload = json.dumps({
-            "q": query,
-            "num": num_results,
-            "gl": "us",
-            "hl": "en"
-        })
-
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
-
-        conn.request("POST", "/search", payload, headers)
-        res = conn.getresponse()
-        data = res.read()
-        results = json.loads(data.decode("utf-8"))
-        conn.close()
+def search_with_serper(query: str, num_results: int = 3, query_class: str = "default",
+                       force_refresh: Optional[bool] = None, gl: str = "us", hl: str = "en") -> List[dict]:
+    """ค้นหาข้อมูลผ่าน Google Serper API (ผลลัพธ์ถูก cache ตาม TTL ของ query_class)"""
+    if force_refresh is None:
+        force_refresh = SERPER_FORCE_REFRESH
 
-        return results.get('organic', [])
+    try:
+        return serper_client.search(
+            query,
+            num_results=num_results,
+            gl=gl,
+            hl=hl,
+            query_class=query_class,
+            force_refresh=force_refresh
+        )
     except Exception as e:
         print(f"⚠️  Serper search error: {str(e)}")
         return []
 
-def fetch_persona_specific_research(market_key: str, persona: str) -> str:
-    """ดึงข้อมูลเฉพาะสำหรับแต่ละ persona ผ่าน Serper"""
-    config = MARKETS[market_key]
-    queries = config.get('persona_queries', {}).get(persona, [])
+def search_many_with_serper(queries: List[str], num_results: int = 3, query_class: str = "default",
+                            force_refresh: Optional[bool] = None) -> List[List[dict]]:
+    """ค้นหาหลาย query ใน request เดียว (batch) คืนผลลัพธ์ตามลำดับ query"""
+    if force_refresh is None:
+        force_refresh = SERPER_FORCE_REFRESH
 
-    all_results = []
-    for query in queries:
-        results = search_with_serper(query, num_results=2)
-        all_results.extend(results)
+    try:
+        return serper_client.search_many(
+            queries,
+            num_results=num_results,
+            query_class=query_class,
+            force_refresh=force_refresh
+        )
+    except Exception as e:
+        print(f"⚠️  Serper search error: {str(e)}")
+        return [[] for _ in queries]
 
-    # Format results for LLM
+def format_research_results(results: List[dict]) -> str:
+    """จัดรูปแบบผลค้นหาสำหรับใส่ใน prompt ของ LLM"""
     research_summary = ""
-    for idx, result in enumerate(all_results[:5], 1):
+    for idx, result in enumerate(results[:5], 1):
         research_summary += f"""
 {idx}. {result.get('title', 'N/A')}
    URL: {result.get('link', 'N/A')}
@@ -269,6 +360,35 @@ def fetch_persona_specific_research(market_key: str, persona: str) -> str:
 
     return research_summary
 
+def fetch_persona_specific_research(market_key: str, persona: str) -> str:
+    """ดึงข้อมูลเฉพาะสำหรับแต่ละ persona ผ่าน Serper"""
+    config = MARKETS[market_key]
+    queries = config.get('persona_queries', {}).get(persona, [])
+
+    all_results = []
+    for results in search_many_with_serper(queries, num_results=2, query_class="persona"):
+        all_results.extend(results)
+
+    return format_research_results(all_results)
+
+def fetch_all_persona_research(market_key: str) -> dict:
+    """ดึงข้อมูลของทุก persona ด้วย Serper batch request เดียว"""
+    config = MARKETS[market_key]
+    persona_queries = config.get('persona_queries', {})
+
+    queries = []
+    owners = []
+    for persona in PERSONAS:
+        for query in persona_queries.get(persona, []):
+            queries.append(query)
+            owners.append(persona)
+
+    grouped = {persona: [] for persona in PERSONAS}
+    for persona, results in zip(owners, search_many_with_serper(queries, num_results=2, query_class="persona")):
+        grouped[persona].extend(results)
+
+    return {persona: format_research_results(results) for persona, results in grouped.items()}
+
 # =====================================================
 # Step 1: Fetch News from yfinance
 # =====================================================
@@ -280,15 +400,16 @@ def fetch_market_news(market_key):
 
     ticker = yf.Ticker(config['symbol'])
 
-    # ดึงข้อมูลราคา
-    hist = ticker.history(period='30d')
-    current_price = hist['Close'].iloc[-1]
-    prev_price = hist['Close'].iloc[-2]
-    price_30d_ago = hist['Close'].iloc[0]
-
-    price_change = current_price - prev_price
-    price_change_pct = (price_change / prev_price) * 100
-    price_change_30d_pct = ((current_price - price_30d_ago) / price_30d_ago) * 100
+    # ดึงข้อมูลราคา - อัปเดต history ในเครื่องเฉพาะแท่งที่ยังไม่มี (ทุกตลาดใน request เดียว)
+    all_symbols = [market['symbol'] for market in MARKETS.values()]
+    hist = price_history_store.refresh(all_symbols).get(config['symbol'])
+    if hist is None or hist.empty:
+        raise ValueError(f"No price history available for {config['symbol']}")
+    stats = compute_price_stats(hist, window_days=30)
+    current_price = stats['current_price']
+    price_change = stats['price_change']
+    price_change_pct = stats['price_change_pct']
+    price_change_30d_pct = stats['price_change_window_pct']
 
     # ดึงข่าว
     news = ticker.news if hasattr(ticker, 'news') and ticker.news else []
@@ -303,8 +424,8 @@ def fetch_market_news(market_key):
         "price_change": price_change,
         "price_change_pct": price_change_pct,
         "price_change_30d_pct": price_change_30d_pct,
-        "high_30d": float(hist['High'].max()),
-        "low_30d": float(hist['Low'].min()),
+        "high_30d": stats['high_window'],
+        "low_30d": stats['low_window'],
         "last_update": datetime.now().isoformat()
     }
 
@@ -312,21 +433,20 @@ def fetch_market_news(market_key):
 # Step 2: Score News with LLM (Simplified)
 # =====================================================
 
-def score_news_with_llm(news_data, market_key):
-    """ให้ LLM ให้คะแนน impact ของข่าวต่อแต่ละภูมิภาค"""
-    config = MARKETS[market_key]
-    print(f"\n🤖 Scoring {config['name']} news with LLM...")
-
-    news_items = news_data["news"]
-    if not news_items:
-        print(f"⚠️  No news found for {config['name']}, creating empty result")
-        return {"news": []}
-
-    dt_context = get_current_datetime_context()
-
-    # สร้าง prompt - เน้นข่าวสำคัญๆ เท่านั้น
+def get_article_key(news) -> str:
+    """คีย์ถาวรของข่าว: canonical URL (ตัด query/fragment) หรือ id ของ yfinance"""
+    content = news.get('content', news)
+    url = content.get('canonicalUrl', {}).get('url') or content.get('link') or ''
+    if url:
+        parts = urlsplit(url.strip())
+        path = parts.path.rstrip('/') or '/'
+        return f"{parts.scheme.lower()}://{parts.netloc.lower()}{path}"
+    return str(news.get('id') or content.get('id') or content.get('title', ''))
+
+def _format_news_for_prompt(numbered_news) -> str:
+    """numbered_news: list of (idx, news) -> ข้อความสำหรับ prompt"""
     news_summary = ""
-    for idx, news in enumerate(news_items[:10], 1):  # ลดจาก 20 เป็น 10
+    for idx, news in numbered_news:
         content = news.get('content', news)
         pub_date = content.get('pubDate', content.get('displayTime', ''))
         thumbnail_url = ''
@@ -344,6 +464,65 @@ def score_news_with_llm(news_data, market_key):
    Link: {content.get('canonicalUrl', {}).get('url', content.get('link', 'N/A'))}
    Thumbnail: {thumbnail_url}
 """
+    return news_summary
+
+async def score_news_with_llm(news_data, market_key):
+    """ให้ LLM ให้คะแนน impact ของข่าวต่อแต่ละภูมิภาค
+
+    ข่าวที่เคยให้คะแนนแล้ว (ดูจาก scored_news_cache) จะไม่ถูกส่งให้ LLM ซ้ำ
+    ส่งเฉพาะข่าวใหม่ แล้วรวมผลกับคะแนนเดิม
+    """
+    config = MARKETS[market_key]
+    print(f"\n🤖 Scoring {config['name']} news with LLM...")
+
+    news_items = news_data["news"]
+    if not news_items:
+        print(f"⚠️  No news found for {config['name']}, creating empty result")
+        return {"news": []}
+
+    top_news = list(enumerate(news_items[:10], 1))  # ลดจาก 20 เป็น 10
+    store_keys = {idx: f"{market_key}:{get_article_key(news)}" for idx, news in top_news}
+
+    scored = {}
+    unseen = []
+    for idx, news in top_news:
+        cached = scored_news_cache.get(store_keys[idx])
+        if cached is None:
+            unseen.append((idx, news))
+        else:
+            scored[idx] = cached
+
+    print(f"♻️  {len(scored)} articles already scored, {len(unseen)} new")
+
+    if unseen:
+        for idx, item in (await _score_unseen_news(unseen, config)).items():
+            scored[idx] = item
+        # ข่าวที่ LLM ไม่เลือก (impact ต่ำ) ก็จำไว้ด้วย จะได้ไม่ส่งซ้ำรอบหน้า
+        for idx, _ in unseen:
+            scored_news_cache.set(store_keys[idx], scored.get(idx, {"omitted": True}), persist=False)
+        await asyncio.to_thread(scored_news_cache.flush)
+
+    merged = []
+    for idx, news in top_news:
+        item = scored.get(idx)
+        if not item or item.get("omitted"):
+            continue
+        content = news.get('content', news)
+        pub_date = content.get('pubDate', content.get('displayTime', ''))
+        merged.append({**item, "newsId": f"{pub_date[:10]}-{idx}"})
+
+    result = NewsScoreList(news=merged)
+
+    print(f"✅ Scored {len(result.news)} news articles")
+
+    return result.model_dump()
+
+async def _score_unseen_news(unseen, config) -> dict:
+    """ส่งข่าวใหม่ให้ LLM ให้คะแนน คืน dict {idx: scored_news_dict}"""
+    dt_context = get_current_datetime_context()
+
+    # สร้าง prompt - เน้นข่าวสำคัญๆ เท่านั้น
+    news_summary = _format_news_for_prompt(unseen)
 
     system_prompt = f"You are a financial analyst specialized in {config['name']} markets. Focus on high-impact news only. Return structured JSON matching this schema: {NewsScoreList.model_json_schema()}"
 
@@ -364,41 +543,48 @@ Focus on HIGH-IMPACT news only (score >= 60).
 
 Return a JSON object with a "news" array containing the scored news items."""
 
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        response_format={"type": "json_object"},
-    )
+    result = await request_llm_json(system_prompt, user_prompt, NewsScoreList)
 
-    result_json = json.loads(response.choices[0].message.content)
-    result = NewsScoreList(**result_json)
+    # จับคู่ผลลัพธ์กลับไปที่ข่าวต้นฉบับ ด้วย ID ใน prompt หรือ link
+    by_id = {}
+    by_url = {}
+    for idx, news in unseen:
+        content = news.get('content', news)
+        pub_date = content.get('pubDate', content.get('displayTime', ''))
+        by_id[f"{pub_date[:10]}-{idx}"] = idx
+        by_url[get_article_key(news)] = idx
 
-    print(f"✅ Scored {len(result.news)} news articles")
+    matched = {}
+    for item in result.news:
+        idx = by_id.get(item.newsId)
+        if idx is None and item.link:
+            idx = by_url.get(get_article_key({"link": item.link}))
+        if idx is not None:
+            matched[idx] = item.model_dump()
 
-    return result.model_dump()
+    return matched
 
 # =====================================================
 # Step 3: Fetch Price Forecasts (Enhanced with Serper)
 # =====================================================
 
-def fetch_price_forecasts(market_key):
+async def fetch_price_forecasts(market_key):
     """ดึงพยากรณ์ราคาจาก Google Serper + LLM"""
     config = MARKETS[market_key]
     print(f"\n📊 Fetching {config['name']} price forecasts with Serper...")
 
     all_results = []
 
-    for query in config['search_queries']:
-        results = search_with_serper(query, num_results=3)
+    search_results = await asyncio.to_thread(
+        search_many_with_serper, config['search_queries'], num_results=3, query_class="forecast"
+    )
+    for results in search_results:
         all_results.extend(results[:2])
 
     # ให้ LLM วิเคราะห์และดึง forecast
     search_summary = json.dumps(all_results, indent=2)
 
-    system_prompt = f"You are a financial analyst. Extract price forecasts for different quarters. Return structured JSON with a 'forecasts' array."
+    system_prompt = "You are a financial analyst. Extract price forecasts for different quarters. Return structured JSON with a 'forecasts' array."
 
     user_prompt = f"""Extract {config['name']} price forecasts from these search results.
 
@@ -418,18 +604,7 @@ For EACH forecast provide:
 If exact forecasts not found, make reasonable estimates based on trends.
 Return a JSON object with "forecasts" array."""
 
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt}
-        ],
-        response_format={"type": "json_object"},
-        # temperature=0.7
-    )
-
-    result_json = json.loads(response.choices[0].message.content)
-    result = PriceForecastList(**result_json)
+    result = await request_llm_json(system_prompt, user_prompt, PriceForecastList)
 
     print(f"✅ Found {len(result.forecasts)} quarterly forecasts")
 
@@ -439,18 +614,23 @@ Return a JSON object with "forecasts" array."""
 # Step 4: Generate Simplified Popup with Persona Recommendations
 # =====================================================
 
-def generate_simplified_popup(news_scores, price_forecasts, market_data, market_key):
-    """สร้าง Popup แบบใหม่ - เน้น Key Metrics + 3 Persona Recommendations"""
+async def generate_simplified_popup(news_scores, price_forecasts, market_data, market_key, persona_research=None):
+    """สร้าง Popup แบบใหม่ - เน้น Key Metrics + 3 Persona Recommendations
+
+    persona_research: dict {persona: research_summary} ที่ดึงไว้แล้ว (ถ้าไม่ส่งมาจะดึงจาก Serper ที่นี่)
+    """
     config = MARKETS[market_key]
     print(f"\n🎯 Generating simplified popup for {config['name']}...")
 
     dt_context = get_current_datetime_context()
 
     # Fetch persona-specific research
-    print("🔍 Fetching persona-specific research from Serper...")
-    sme_research = fetch_persona_specific_research(market_key, "sme")
-    supply_research = fetch_persona_specific_research(market_key, "supply_chain")
-    investor_research = fetch_persona_specific_research(market_key, "investor")
+    if persona_research is None:
+        print("🔍 Fetching persona-specific research from Serper...")
+        persona_research = await asyncio.to_thread(fetch_all_persona_research, market_key)
+    sme_research = persona_research["sme"]
+    supply_research = persona_research["supply_chain"]
+    investor_research = persona_research["investor"]
 
     current_price = market_data['current_price']
     price_change_pct = market_data['price_change_pct']
@@ -653,18 +833,7 @@ IMPORTANT: Return EXACT JSON structure:
 
     system_prompt = f"You are a market analyst. Create SIMPLIFIED, ACTIONABLE insights for {name_th}. Focus on 3 user personas: SME, Supply Chain, Investor. Use research data to make specific recommendations."
 
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt_text}
-        ],
-        response_format={"type": "json_object"},
-        # temperature=0.7
-    )
-
-    result_json = json.loads(response.choices[0].message.content)
-    result = SimplifiedPopupData(**result_json)
+    result = await request_llm_json(system_prompt, prompt_text, SimplifiedPopupData)
 
     print(f"✅ Simplified popup generated with {len(result.recommendations)} persona recommendations")
 
@@ -674,7 +843,7 @@ IMPORTANT: Return EXACT JSON structure:
 # Step 5: Generate Full Report HTML (Streamlined)
 # =====================================================
 
-def generate_full_report(news_scores, price_forecasts, popup_data, market_data, market_key):
+async def generate_full_report(news_scores, price_forecasts, popup_data, market_data, market_key):
     """สร้างรายงานฉบับเต็มแบบ HTML - Streamlined version"""
     config = MARKETS[market_key]
     print(f"\n📄 Generating {config['name']} full report HTML...")
@@ -729,18 +898,7 @@ Return a JSON object with 'html' field containing the full HTML report."""
 
     system_prompt = f"You are a commodity strategist. Create FOCUSED, ACTIONABLE {config['name_th']} report in Thai."
 
-    response = client.chat.completions.create(
-        model=DEPLOYMENT_NAME,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt_text}
-        ],
-        response_format={"type": "json_object"},
-        # temperature=0.7
-    )
-
-    result_json = json.loads(response.choices[0].message.content)
-    result = FullReportOutput(**result_json)
+    result = await request_llm_json(system_prompt, prompt_text, FullReportOutput)
 
     print(f"✅ {config['name']} full report HTML generated")
 
@@ -772,88 +930,280 @@ def save_market_data(market_key, news_scores, price_forecasts, popup_data, full_
         "report": full_report
     }
 
-    filename = f"{OUTPUT_DIR}/{market_key}_data.json"
-    with open(filename, 'w', encoding='utf-8') as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False)
+    combined_path = f"{OUTPUT_DIR}/{market_key}_data.json"
+    # ล็อกเดียวกับ refresh_market_news เพื่อไม่ให้เขียนทับกันไปมา
+    with file_lock(f"{combined_path}.lock"):
+        write_json(combined_path, combined)
+
+    # แยกไฟล์ตาม section + อัปเดต manifest ให้ client ดึงเฉพาะส่วนที่ใช้
+    publish_sections(
+        OUTPUT_DIR,
+        market_key,
+        {section: combined[section] for section in SECTIONS},
+        market_info=combined,
+        generated_at=combined["generatedAt"]
+    )
 
-    print(f"✅ Saved: {market_key}_data.json")
+    print(f"✅ Saved: {market_key}_data.json + markets/{market_key}/*.json")
 
     return combined
 
+def update_combined_news(market_key, news_scores):
+    """แทนที่ข่าวใน <market>_data.json โดยถือล็อกเดียวกับ save_market_data ตลอดการอ่าน-เขียน"""
+    combined_path = f"{OUTPUT_DIR}/{market_key}_data.json"
+    with file_lock(f"{combined_path}.lock"):
+        if not os.path.exists(combined_path):
+            return
+        with open(combined_path, 'r', encoding='utf-8') as f:
+            combined = json.load(f)
+        combined["news"] = news_scores
+        write_json(combined_path, combined)
+
+async def refresh_market_news(market_key):
+    """อัปเดตเฉพาะ section ข่าวของตลาดหนึ่งๆ (ไม่เรียก LLM สำหรับ popup/report)"""
+    market_data = await asyncio.to_thread(fetch_market_news, market_key)
+    news_scores = await score_news_with_llm(market_data, market_key)
+
+    config = MARKETS[market_key]
+    generated_at = datetime.now().isoformat()
+    await asyncio.to_thread(
+        publish_sections,
+        OUTPUT_DIR,
+        market_key,
+        {"news": news_scores},
+        market_info={
+            "marketName": config['name'],
+            "marketNameTh": config['name_th'],
+            "symbol": config['symbol'],
+            "unit": config['unit']
+        },
+        generated_at=generated_at
+    )
+
+    # ให้ไฟล์รวมของตลาดมีข่าวชุดเดียวกับ shard
+    await asyncio.to_thread(update_combined_news, market_key, news_scores)
+
+    print(f"✅ {config['name']} news section refreshed")
+    return news_scores
+
+async def refresh_news_sections(market_keys, max_concurrency=MAX_CONCURRENT_MARKETS):
+    """อัปเดต section ข่าวของหลายตลาดพร้อมกัน ตลาดที่ล้มเหลวจะไม่กระทบตลาดอื่น"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(market_key):
+        async with semaphore:
+            return await refresh_market_news(market_key)
+
+    results = await asyncio.gather(
+        *(run_one(market_key) for market_key in market_keys),
+        return_exceptions=True
+    )
+    for market_key, result in zip(market_keys, results):
+        if isinstance(result, BaseException):
+            print(f"❌ ERROR refreshing {MARKETS[market_key]['name']} news: {result}")
+
+def write_all_markets_index(all_markets_data):
+    """บันทึกไฟล์รวมทุกตลาด (legacy; client ใหม่อ่าน manifest.json + section shards)
+
+    รวมกับ index เดิม: ตลาดที่ไม่ได้ประมวลผลในรอบนี้ (เช่นรันด้วย --markets บางตลาด
+    หรือ Celery task รายตลาด) ยังคงข้อมูลเดิมไว้
+    """
+    index_path = f"{OUTPUT_DIR}/all_markets.json"
+    with file_lock(f"{index_path}.lock"):
+        try:
+            with open(index_path, 'r', encoding='utf-8') as f:
+                existing = json.load(f).get("data") or {}
+        except (OSError, ValueError, AttributeError):
+            existing = {}
+
+        data = {key: existing[key] for key in MARKETS if key in existing}
+        data.update(all_markets_data)
+        index_data = {
+            "generatedAt": datetime.now().isoformat(),
+            "markets": list(MARKETS.keys()),
+            "data": data
+        }
+        write_json(index_path, index_data)
+
 # =====================================================
 # Main Execution
 # =====================================================
 
-def process_market(market_key):
-    """ประมวลผลข้อมูลสำหรับตลาดหนึ่งๆ"""
-    config = MARKETS[market_key]
+def build_market_pipeline(market_key):
+    """สร้าง dependency graph ของขั้นตอนทั้งหมดสำหรับตลาดหนึ่งๆ
 
-    print("\n" + "="*60)
-    print(f"🎯 Processing: {config['name']} ({config['name_th']})")
-    print("="*60)
+    ขั้นตอนที่ไม่ขึ้นต่อกันจะรันพร้อมกัน:
+      market_data ──> news_scores ──┐
+      price_forecasts ──────────────┼──> popup ──> report ──> save
+      persona_research ─────────────┘
+    """
+    graph = StepGraph()
 
-    try:
-        # Step 1: Fetch news
-        market_data = fetch_market_news(market_key)
+    # Step 1: Fetch news
+    graph.add("market_data", lambda: fetch_market_news(market_key))
+
+    # Step 2: Score news (simplified)
+    async def news_scores_step(market_data):
+        return await score_news_with_llm(market_data, market_key)
+
+    graph.add("news_scores", news_scores_step, deps=["market_data"])
+
+    # Step 3: Get price forecasts (with Serper)
+    async def price_forecasts_step():
+        return await fetch_price_forecasts(market_key)
+
+    graph.add("price_forecasts", price_forecasts_step)
+
+    # Persona research for step 4 (one Serper batch for all personas, no dependencies)
+    graph.add("persona_research", lambda: fetch_all_persona_research(market_key))
+
+    # Step 4: Generate simplified popup with persona recommendations
+    async def popup_step(news_scores, price_forecasts, market_data, persona_research):
+        return await generate_simplified_popup(
+            news_scores, price_forecasts, market_data, market_key, persona_research
+        )
+
+    graph.add(
+        "popup",
+        popup_step,
+        deps=["news_scores", "price_forecasts", "market_data", "persona_research"]
+    )
+
+    # Step 5: Generate full report (streamlined)
+    async def report_step(news_scores, price_forecasts, popup, market_data):
+        return await generate_full_report(news_scores, price_forecasts, popup, market_data, market_key)
 
-        # Step 2: Score news (simplified)
-        news_scores = score_news_with_llm(market_data, market_key)
+    graph.add("report", report_step, deps=["news_scores", "price_forecasts", "popup", "market_data"])
 
-        # Step 3: Get price forecasts (with Serper)
-        price_forecasts = fetch_price_forecasts(market_key)
+    # Step 6: Save everything
+    graph.add(
+        "save",
+        lambda news_scores, price_forecasts, popup, report: save_market_data(
+            market_key, news_scores, price_forecasts, popup, report
+        ),
+        deps=["news_scores", "price_forecasts", "popup", "report"]
+    )
 
-        # Step 4: Generate simplified popup with persona recommendations
-        popup_data = generate_simplified_popup(news_scores, price_forecasts, market_data, market_key)
+    return graph
+
+async def process_market_async(market_key):
+    """ประมวลผลข้อมูลสำหรับตลาดหนึ่งๆ ตาม dependency graph"""
+    config = MARKETS[market_key]
 
-        # Step 5: Generate full report (streamlined)
-        full_report = generate_full_report(news_scores, price_forecasts, popup_data, market_data, market_key)
+    print("\n" + "="*60)
+    print(f"🎯 Processing: {config['name']} ({config['name_th']})")
+    print("="*60)
 
-        # Step 6: Save everything
-        combined_data = save_market_data(market_key, news_scores, price_forecasts, popup_data, full_report)
+    try:
+        run = await build_market_pipeline(market_key).run()
 
-        print(f"✅ {config['name']} data generated successfully!")
+        print(f"✅ {config['name']} data generated successfully in {run.total_seconds:.1f}s")
+        print(f"⏱️  {config['name']} step timeline:\n{run.format_timeline()}")
 
-        return combined_data
+        return run.results["save"]
 
     except Exception as e:
         print(f"❌ ERROR processing {config['name']}: {str(e)}")
+        graph_run = getattr(e, "graph_run", None)
+        if graph_run is not None:
+            print(f"⏱️  {config['name']} step timeline:\n{graph_run.format_timeline()}")
         import traceback
         traceback.print_exc()
         return None
 
-def main():
+def process_market(market_key):
+    """ประมวลผลข้อมูลสำหรับตลาดหนึ่งๆ (sync wrapper ของ process_market_async)"""
+    return asyncio.run(process_market_async(market_key))
+
+async def process_markets_concurrently(market_keys, max_concurrency=MAX_CONCURRENT_MARKETS):
+    """ประมวลผลหลายตลาดพร้อมกัน โดยจำกัดจำนวนที่รันพร้อมกันไม่เกิน max_concurrency
+
+    ขั้นตอนที่ blocking ของแต่ละตลาดรันใน worker thread ถ้าตลาดใดล้มเหลวจะไม่กระทบตลาดอื่น
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run_one(market_key):
+        async with semaphore:
+            return await process_market_async(market_key)
+
+    results = await asyncio.gather(
+        *(run_one(market_key) for market_key in market_keys),
+        return_exceptions=True
+    )
+
+    all_markets_data = {}
+    for market_key, result in zip(market_keys, results):
+        if isinstance(result, BaseException):
+            print(f"❌ ERROR processing {MARKETS[market_key]['name']}: {result}")
+        elif result:
+            all_markets_data[market_key] = result
+
+    return all_markets_data
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Market Pulse data generator V2")
+    parser.add_argument(
+        "--markets",
+        nargs="+",
+        choices=list(MARKETS.keys()),
+        default=list(MARKETS.keys()),
+        help="ตลาดที่ต้องการประมวลผล (default: ทุกตลาด)"
+    )
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=MAX_CONCURRENT_MARKETS,
+        help="จำนวนตลาดสูงสุดที่ประมวลผลพร้อมกัน (1 = ทีละตลาด)"
+    )
+    parser.add_argument(
+        "--refresh-search",
+        action="store_true",
+        help="ข้าม Serper cache และดึงผลค้นหาใหม่ทั้งหมด"
+    )
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="ไม่ใช้คำตอบ LLM จาก cache (ยังบันทึกคำตอบใหม่ลง cache)"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """รันระบบทั้งหมดสำหรับทุกตลาด"""
+    global SERPER_FORCE_REFRESH
+
+    args = parse_args(argv)
+    market_keys = args.markets
+    if args.refresh_search:
+        SERPER_FORCE_REFRESH = True
+    if args.no_llm_cache:
+        llm_client.enabled = False
+
     print("="*60)
     print("🚀 MARKET PULSE DATA GENERATOR V2 - PERSONA-BASED INSIGHTS")
     print("="*60)
     print(f"⏰ Start Time: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    print(f"📊 Markets: Crude Oil, Sugar, USD/THB")
-    print(f"👥 Personas: SME, Supply Chain, Investor\n")
-
-    all_markets_data = {}
+    print(f"📊 Markets: {', '.join(MARKETS[key]['name'] for key in market_keys)}")
+    print(f"⚡ Max concurrency: {args.max_concurrency}")
+    print("👥 Personas: SME, Supply Chain, Investor\n")
 
-    # Process each market
-    for market_key in ["crude_oil", "sugar", "usd_thb"]:
-        market_data = process_market(market_key)
-        if market_data:
-            all_markets_data[market_key] = market_data
+    # Process all markets concurrently
+    try:
+        all_markets_data = asyncio.run(
+            process_markets_concurrently(market_keys, args.max_concurrency)
+        )
+    finally:
+        serper_client.close()
 
     # Save combined index file
-    index_data = {
-        "generatedAt": datetime.now().isoformat(),
-        "markets": list(MARKETS.keys()),
-        "data": all_markets_data
-    }
-
-    with open(f"{OUTPUT_DIR}/all_markets.json", 'w', encoding='utf-8') as f:
-        json.dump(index_data, f, indent=2, ensure_ascii=False)
+    write_all_markets_index(all_markets_data)
 
     print("\n" + "="*60)
     print("✅ ALL MARKETS DATA GENERATED SUCCESSFULLY!")
     print("="*60)
     print(f"⏰ Completed: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"📁 Output Directory: {OUTPUT_DIR}")
-    print(f"📊 Markets processed: {len(all_markets_data)}/{len(MARKETS)}")
+    print(f"📊 Markets processed: {len(all_markets_data)}/{len(market_keys)}")
+    print(f"🧠 LLM cache: {llm_client.format_stats()}")
 
 if __name__ == "__main__":
     main()
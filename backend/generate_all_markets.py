@@ -5,7 +5,6 @@ Market Pulse Data Generator
 """
 
 import yfinance as yf
-import http.client
 import json
 from datetime import datetime
 from openai import OpenAI
@@ -13,10 +12,15 @@ from pydantic import BaseModel
 from typing import List
 import os
 
+from app.core.json_output import write_json
+from app.services.serper_client import SerperClient
+
 # =====================================================
 # Configuration
 # =====================================================
 
+# Keep-alive Serper connections reused across all forecast queries
+serper_client = SerperClient(api_key=os.getenv("SERPER_API_KEY"))
 
 
 # Get current date/time for prompts
@@ -234,8 +238,6 @@ def fetch_price_forecasts():
     """ดึงพยากรณ์ราคาจาก Google Serper + LLM"""
     print("\n📊 Fetching price forecasts...")
 
-    conn = http.client.HTTPSConnection("google.serper.dev")
-
     queries = [
         "crude oil price forecast Q3 2025 Q4 2025",
         "WTI crude oil forecast 2025 2026",
@@ -245,28 +247,8 @@ def fetch_price_forecasts():
 
     all_results = []
 
-    for query in queries:
-        payload = json.dumps({
-            "q": query,
-            "num": 3,
-            "gl": "us",
-            "hl": "en"
-        })
-
-        headers = {
-            'X-API-KEY': SERPER_API_KEY,
-            'Content-Type': 'application/json'
-        }
-
-        conn.request("POST", "/search", payload, headers)
-        res = conn.getresponse()
-        data = res.read()
-        results = json.loads(data.decode("utf-8"))
-
-        if 'organic' in results:
-            all_results.extend(results['organic'][:2])
-
-    conn.close()
+    for results in serper_client.search_many(queries, num_results=3):
+        all_results.extend(results[:2])
 
     # ให้ LLM วิเคราะห์และดึง forecast
     search_summary = json.dumps(all_results, indent=2)
@@ -630,27 +612,20 @@ def save_data(news_scores, price_forecasts, popup_analysis, full_report):
     """บันทึกข้อมูลทั้งหมดเป็นไฟล์ JSON"""
     print("\n💾 Saving data files...")
 
-    # สร้าง directory ถ้ายังไม่มี
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
-
     # 1. News with scores
-    with open(f"{OUTPUT_DIR}/news_scores.json", 'w', encoding='utf-8') as f:
-        json.dump(news_scores, f, indent=2, ensure_ascii=False)
+    write_json(f"{OUTPUT_DIR}/news_scores.json", news_scores)
     print(f"✅ Saved: news_scores.json")
 
     # 2. Price forecasts
-    with open(f"{OUTPUT_DIR}/price_forecasts.json", 'w', encoding='utf-8') as f:
-        json.dump(price_forecasts, f, indent=2, ensure_ascii=False)
+    write_json(f"{OUTPUT_DIR}/price_forecasts.json", price_forecasts)
     print(f"✅ Saved: price_forecasts.json")
 
     # 3. Pop-up analysis
-    with open(f"{OUTPUT_DIR}/popup_analysis.json", 'w', encoding='utf-8') as f:
-        json.dump(popup_analysis, f, indent=2, ensure_ascii=False)
+    write_json(f"{OUTPUT_DIR}/popup_analysis.json", popup_analysis)
     print(f"✅ Saved: popup_analysis.json")
 
     # 4. Full report
-    with open(f"{OUTPUT_DIR}/full_report.json", 'w', encoding='utf-8') as f:
-        json.dump(full_report, f, indent=2, ensure_ascii=False)
+    write_json(f"{OUTPUT_DIR}/full_report.json", full_report)
     print(f"✅ Saved: full_report.json")
 
     # 5. Combined data (สำหรับ frontend ดึงครั้งเดียว)
@@ -662,8 +637,7 @@ def save_data(news_scores, price_forecasts, popup_analysis, full_report):
         "report": full_report
     }
 
-    with open(f"{OUTPUT_DIR}/market_data.json", 'w', encoding='utf-8') as f:
-        json.dump(combined, f, indent=2, ensure_ascii=False)
+    write_json(f"{OUTPUT_DIR}/market_data.json", combined)
     print(f"✅ Saved: market_data.json (combined)")
 
 # =====================================================
@@ -4,11 +4,13 @@ MarketPulse - Real Market Data Fetcher
 รวมถึง: Price, Change, High, Low, Volume และ Timestamp
 """
 
-import yfinance as yf
-import json
 from datetime import datetime
 import os
 
+from app.core.config import settings
+from app.core.json_output import write_json
+from app.services.price_history_store import price_history_store
+
 # Use relative path from backend directory to frontend/public/data
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 OUTPUT_DIR = os.path.join(SCRIPT_DIR, "..", "frontend", "public", "data")
@@ -42,21 +44,20 @@ MARKETS = {
 }
 
 
-def fetch_market_data(market_key):
+def fetch_market_data(market_key, hist=None):
     """
     ดึงข้อมูลตลาดจริงจาก yfinance
+    hist: DataFrame ราคาที่ดาวน์โหลดไว้แล้ว (ถ้าไม่ส่งมาจะอ่านจาก history ในเครื่อง)
     Returns: dict with price, change, high, low, volume, timestamp
     """
     config = MARKETS[market_key]
     print(f"\n📊 Fetching {config['name']} market data...")
 
     try:
-        ticker = yf.Ticker(config['symbol'])
-
-        # ดึงข้อมูลย้อนหลัง 5 วัน
-        hist = ticker.history(period='5d')
+        if hist is None:
+            hist = price_history_store.refresh([config['symbol']]).get(config['symbol'])
 
-        if hist.empty:
+        if hist is None or hist.empty:
             raise ValueError(f"No data available for {config['symbol']}")
 
         # ข้อมูลล่าสุด
@@ -93,6 +94,8 @@ def fetch_market_data(market_key):
             "volume": int(volume),
             "change": round(price_change, 2),
             "changePercent": round(price_change_pct, 2),
+            "prevClose": round(prev_close, 2),
+            "lastTradeTime": hist.index[-1].isoformat(),
             "lastUpdate": last_update,
             "dataSource": "yfinance"
         }
@@ -120,8 +123,20 @@ def fetch_all_markets():
         "markets": []
     }
 
-    for market_key in MARKETS.keys():
-        market_data = fetch_market_data(market_key)
+    # อัปเดต history ในเครื่องเฉพาะแท่งที่ขาด (ทุกตลาดใน request เดียว) แล้วแยกตามตลาด
+    symbols = [config['symbol'] for config in MARKETS.values()]
+    try:
+        histories = price_history_store.refresh(symbols)
+    except Exception as e:
+        print(f"❌ Batch download failed: {e}")
+        histories = {}
+
+    for market_key, config in MARKETS.items():
+        hist = histories.get(config['symbol'])
+        if hist is None:
+            print(f"❌ Error fetching {config['name']}: No data available for {config['symbol']}")
+            continue
+        market_data = fetch_market_data(market_key, hist)
         if market_data:
             all_data["markets"].append(market_data)
 
@@ -130,17 +145,29 @@ def fetch_all_markets():
 
 def save_to_file(data, filename="market_data.json"):
     """บันทึกข้อมูลลง JSON file"""
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
     output_path = os.path.join(OUTPUT_DIR, filename)
-
-    with open(output_path, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    write_json(output_path, data)
 
     print(f"\n✅ Market data saved to: {output_path}")
     print(f"   Total markets: {len(data['markets'])}")
     print(f"   Generated at: {data['generatedAt']}")
 
 
+def save_to_database(data):
+    """อัปเดตตาราง market_data ด้วย bulk upsert เดียวต่อรอบ"""
+    from app.core.database import SessionLocal, create_tables
+    from app.services.market_service import MarketService, rows_from_fetcher
+
+    create_tables()
+    db = SessionLocal()
+    try:
+        count = MarketService(db).upsert_market_data(rows_from_fetcher(data))
+    finally:
+        db.close()
+
+    print(f"✅ Upserted {count} markets into market_data")
+
+
 def main():
     """Main function"""
     try:
@@ -149,6 +176,8 @@ def main():
 
         # Save to file
         save_to_file(market_data)
+        if not settings.USE_MOCK_DATA:
+            save_to_database(market_data)
 
         print("\n" + "="*60)
         print("✨ Market data fetch completed successfully!")
@@ -0,0 +1,30 @@
+"""
+MarketPulse - Refresh Daemon
+รัน job อัปเดตราคา / ข่าว / AI insights ตาม interval ใน Settings
+(MARKET_DATA_UPDATE_INTERVAL, NEWS_UPDATE_INTERVAL, AI_INSIGHTS_UPDATE_INTERVAL)
+โดยไม่ต้องเปิด API server
+"""
+
+import asyncio
+
+from app.services.refresh_jobs import build_scheduler
+
+
+def main():
+    """Main function"""
+    scheduler = build_scheduler()
+
+    print("="*60)
+    print("⏰ MARKET PULSE REFRESH DAEMON")
+    print("="*60)
+    for job in scheduler.jobs.values():
+        print(f"   {job.name}: every {job.interval}s")
+
+    try:
+        asyncio.run(scheduler.run_forever())
+    except KeyboardInterrupt:
+        print("\n💫 Refresh daemon stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,6 +28,19 @@ interface NewsItem {
   market?: string;
 }
 
+interface ManifestSection {
+  path: string;
+  sha256: string;
+  size: number;
+  generatedAt: string;
+}
+
+interface DataManifest {
+  version: number;
+  generatedAt: string;
+  markets: Record<string, { generatedAt: string; sections: Record<string, ManifestSection> }>;
+}
+
 interface LatestNewsSectionProps {
   maxItems?: number;
 }
@@ -39,23 +52,26 @@ export default function LatestNewsSection({ maxItems = 5 }: LatestNewsSectionPro
   useEffect(() => {
     async function fetchNews() {
       try {
-        const response = await fetch('/data/all_markets.json');
-        const data = await response.json();
+        // manifest เล็กๆ บอก path + hash ของแต่ละ section แล้วดึงเฉพาะ news ของแต่ละตลาด
+        const manifestResponse = await fetch('/data/manifest.json', { cache: 'no-cache' });
+        const manifest: DataManifest = await manifestResponse.json();
+
+        const newsShards = await Promise.all(
+          Object.entries(manifest.markets).map(async ([marketKey, market]) => {
+            const section = market.sections.news;
+            if (!section) return [];
+            // hash ใน query string ทำให้ cache ของ browser ใช้ได้จนกว่าเนื้อหาจะเปลี่ยน
+            const response = await fetch(`/data/${section.path}?v=${section.sha256.slice(0, 16)}`);
+            const shard = await response.json();
+            return (shard.news ?? []).map((newsItem: NewsItem) => ({
+              ...newsItem,
+              market: marketKey,
+            }));
+          })
+        );
 
         // รวมข่าวจากทุกตลาด
-        const newsItems: NewsItem[] = [];
-
-        Object.keys(data.data).forEach((marketKey) => {
-          const marketData = data.data[marketKey];
-          if (marketData.news && marketData.news.news) {
-            marketData.news.news.forEach((newsItem: NewsItem) => {
-              newsItems.push({
-                ...newsItem,
-                market: marketData.market,
-              });
-            });
-          }
-        });
+        const newsItems: NewsItem[] = newsShards.flat();
 
         // เรียงตามวันที่เผยแพร่ (ใหม่สุดก่อน)
         newsItems.sort((a, b) =>